@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Latency of reads of a frozen and an unfrozen
+:class:`hpman.HyperParameterManager`, see
+:meth:`hpman.HyperParameterManager.freeze`.
+
+Usage: python3 benchmarks/bench_freeze.py
+"""
+import timeit
+
+import hpman
+
+
+def build(num_groups: int = 100) -> hpman.HyperParameterManager:
+    _ = hpman.HyperParameterManager("_")
+    source = "\n".join(
+        "_('lr', 0.1)\n" if i == 0 else "_('group{}.sub.lr', {})".format(i, i)
+        for i in range(num_groups)
+    )
+    return _.parse_source(source)
+
+
+def bench(_: hpman.HyperParameterManager, number: int = 200000) -> None:
+    reads = [
+        ('_("lr")', lambda: _("lr")),
+        ('_("lr", 0.1)', lambda: _("lr", 0.1)),
+        ('get_value("group50.sub.lr")', lambda: _.get_value("group50.sub.lr")),
+        ('exists("group50.sub")', lambda: _.exists("group50.sub")),
+        ('get_tree("group50")', lambda: _.get_tree("group50")),
+        ("get_tree()", lambda: _.get_tree()),
+    ]
+    for name, func in reads:
+        n = number // 100 if name == "get_tree()" else number
+        t = min(timeit.repeat(func, number=n, repeat=3))
+        print("{:>28}: {:10.1f} ns/call".format(name, t / n * 1e9))
+
+
+def main():
+    _ = build()
+    print("unfrozen:")
+    bench(_)
+
+    print("frozen:")
+    _.freeze()
+    bench(_)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Latency of reading hyperparameters with ``_("name")`` in a tight loop,
+with the flat name index of :class:`hpman.hpm_db.HyperParamTree` and with the
+recursive lookup used by subtrees.
+
+Usage: python3 benchmarks/bench_get_value.py
+"""
+import timeit
+
+import hpman
+
+
+def build(num_groups: int = 100) -> hpman.HyperParameterManager:
+    _ = hpman.HyperParameterManager("_")
+    source = "\n".join(
+        "_('lr', 0.1)\n" if i == 0 else "_('group{}.sub.lr', {})".format(i, i)
+        for i in range(num_groups)
+    )
+    return _.parse_source(source)
+
+
+def bench(_: hpman.HyperParameterManager, number: int = 200000) -> None:
+    for name in ["lr", "group50.sub.lr"]:
+        t = min(timeit.repeat(lambda: _(name), number=number, repeat=3))
+        print("{:>20}: {:8.1f} ns/call".format(name, t / number * 1e9))
+
+
+def main():
+    _ = build()
+    print("flat index:")
+    bench(_)
+
+    print("recursive lookup:")
+    _.tree._index = None
+    bench(_)
+
+
+if __name__ == "__main__":
+    main()
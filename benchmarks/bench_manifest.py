@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Startup time of a job discovering the hyperparameters of a synthetic large
+repository, by parsing its sources or by loading a manifest exported by
+:meth:`hpman.HyperParameterManager.export_manifest`.
+
+Usage: python3 benchmarks/bench_manifest.py [num_files] [num_hps_per_file]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import hpman
+from bench_memory import make_sources
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_hps = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for filename, source in make_sources(num_files, num_hps):
+            path = os.path.join(tmpdir, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(source)
+        src_dir = os.path.join(tmpdir, "pkg")
+        manifest = os.path.join(tmpdir, "hpman.manifest")
+
+        t = time.perf_counter()
+        _ = hpman.HyperParameterManager("_").parse_file(src_dir)
+        print("parse_file: {:.3f} s".format(time.perf_counter() - t))
+
+        t = time.perf_counter()
+        _.export_manifest(manifest)
+        print(
+            "export_manifest: {:.3f} s, {:.2f} MiB".format(
+                time.perf_counter() - t, os.path.getsize(manifest) / 2 ** 20
+            )
+        )
+
+        for check_stale in [True, False]:
+            t = time.perf_counter()
+            hpman.HyperParameterManager("_").load_manifest(
+                manifest, check_stale=check_stale
+            )
+            print(
+                "load_manifest(check_stale={}): {:.3f} s".format(
+                    check_stale, time.perf_counter() - t
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""Memory held by a :class:`hpman.HyperParameterManager` after parsing a
+synthetic large repository, and the time to parse it.
+
+Usage: python3 benchmarks/bench_memory.py [num_files] [num_hps_per_file]
+"""
+import sys
+import time
+import tracemalloc
+
+import hpman
+
+
+def make_sources(num_files: int, num_hps: int):
+    for i in range(num_files):
+        lines = []
+        for j in range(num_hps):
+            name = "module{}.group{}.hp{}".format(i, j % 20, j)
+            if j % 3 == 0:
+                lines.append("_('{}', {})".format(name, j))
+            elif j % 3 == 1:
+                # a reference to a hyperparameter defined in another file
+                other = "module{}.group{}.hp{}".format((i + 1) % num_files, 0, 0)
+                lines.append("x = _('{}')".format(other))
+            else:
+                lines.append("_('{}', [{}, 'a'], range=[0, 10])".format(name, j))
+        yield "pkg/lib{}.py".format(i), "\n".join(lines) + "\n"
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_hps = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    sources = list(make_sources(num_files, num_hps))
+
+    tracemalloc.start()
+    t = time.perf_counter()
+    _ = hpman.HyperParameterManager("_")
+    for filename, source in sources:
+        _.parse_source(source, filename, keep_ast_nodes=False)
+    t = time.perf_counter() - t
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    num_occurrences = num_files * num_hps
+    print("occurrences: {}".format(num_occurrences))
+    print("hyperparameters: {}".format(_.count()))
+    print("parse time: {:.3f} s".format(t))
+    print(
+        "memory: {:.1f} MiB, {:.0f} bytes/occurrence".format(
+            current / 2 ** 20, current / num_occurrences
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Per-file latency of hyperparameter extraction on large generated modules,
+comparing the previous ``ast.walk`` + ``ast.literal_eval`` extractor with
+:func:`hpman.hpm_parser.parse_source_occurrences`.
+
+Usage: python3 benchmarks/bench_parse_source.py [num_functions]
+"""
+import ast
+import sys
+import timeit
+
+from hpman.hpm_parser import parse_source_occurrences
+
+
+def generate_module(num_functions: int) -> str:
+    chunks = []
+    for i in range(num_functions):
+        chunks.append(
+            "def func_{i}(x, y={i}):\n"
+            "    z = [x * k for k in range(y) if k % 3]\n"
+            "    if z and x > {i}:\n"
+            "        return {{'a': z, 'b': (x, y), 'c': 'str_{i}'}}\n"
+            "    return sum(z) / max(1, len(z))\n".format(i=i)
+        )
+        if i % 20 == 0:
+            chunks.append(
+                "hp_{i} = _('group_{i}.lr', [{i}, 0.1, 'linear'], help='lr')\n"
+                "opt_{i} = _('group_{i}.opt', {{'type': 'sgd', 'momentum': 0.9}})\n"
+                "_('group_{i}.lr')\n".format(i=i)
+            )
+    return "\n".join(chunks)
+
+
+def legacy_extract(source: str, placeholder: str):
+    results = []
+    for node in ast.walk(ast.parse(source)):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == placeholder
+        ):
+            name = ast.literal_eval(node.args[0])
+            value = ast.literal_eval(node.args[1]) if len(node.args) == 2 else None
+            hints = {k.arg: ast.literal_eval(k.value) for k in node.keywords}
+            results.append((name, value, hints))
+    return results
+
+
+def main():
+    num_functions = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    source = generate_module(num_functions)
+    print(
+        "module: {} lines, {} KiB".format(source.count("\n"), len(source) // 1024)
+    )
+
+    expected = legacy_extract(source, "_")
+    actual = [
+        (occ.name, occ.value if occ.has_default_value else None, occ.hints)
+        for occ in parse_source_occurrences(source, "<bench>", "_")
+    ]
+    assert actual == expected
+
+    number = 5
+    for label, func in [
+        ("ast.parse only", lambda: ast.parse(source)),
+        ("before (ast.walk)", lambda: legacy_extract(source, "_")),
+        ("after", lambda: parse_source_occurrences(source, "<bench>", "_")),
+    ]:
+        t = min(timeit.repeat(func, number=number, repeat=3)) / number
+        print("{:>20}: {:8.2f} ms/file".format(label, t * 1e3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Size of a pickled :class:`hpman.HyperParameterManager` of a synthetic
+large repository, and the time to unpickle it, e.g. in each worker process
+started with ``spawn``, at every pickle level.
+
+Usage: python3 benchmarks/bench_pickle.py [num_files] [num_hps_per_file]
+"""
+import pickle
+import sys
+import time
+
+import hpman
+from bench_memory import make_sources
+from hpman.hpm_db import PICKLE_LEVELS
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_hps = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+
+    _ = hpman.HyperParameterManager("_")
+    for filename, source in make_sources(num_files, num_hps):
+        _.parse_source(source, filename)
+    print("hyperparameters: {}".format(_.count()))
+
+    for level in PICKLE_LEVELS:
+        _.pickle_level = level
+        t = time.perf_counter()
+        data = pickle.dumps(_, protocol=pickle.HIGHEST_PROTOCOL)
+        t_dump = time.perf_counter() - t
+
+        t = time.perf_counter()
+        pickle.loads(data)
+        t_load = time.perf_counter() - t
+        print(
+            "{:>9}: {:7.2f} MiB, pickle {:.3f} s, unpickle {:.3f} s".format(
+                level, len(data) / 2 ** 20, t_dump, t_load
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Unique memory (USS) of forked worker processes that read all
+hyperparameters of a synthetic large repository, with the manager frozen
+by :meth:`hpman.HyperParameterManager.freeze` or packed by
+:meth:`hpman.HyperParameterManager.seal`, with and without
+:func:`gc.freeze`.
+
+Pages shared with the parent are copied into a worker as soon as it writes
+to them, e.g. by changing reference counts or by a garbage collection. USS
+is read from /proc/self/smaps_rollup (linux only). As long as collections
+in the workers walk the whole tree, they dominate; packed values only pay
+off along with ``gc_freeze=True``.
+
+Usage: python3 benchmarks/bench_seal.py [num_workers] [num_files] [num_hps_per_file]
+"""
+import gc
+import os
+import sys
+
+import hpman
+from bench_memory import make_sources
+
+
+def read_uss() -> int:
+    """Unique set size of the current process in bytes."""
+    path = "/proc/self/smaps_rollup"
+    if not os.path.exists(path):
+        path = "/proc/self/smaps"
+    uss = 0
+    with open(path) as f:
+        for line in f:
+            if line.startswith(("Private_Clean:", "Private_Dirty:")):
+                uss += int(line.split()[1]) * 1024
+    return uss
+
+
+def work(_: hpman.HyperParameterManager, names) -> None:
+    for name in names:
+        _(name)
+        _.get_occurrence(name)
+    _.get_tree()
+    gc.collect()
+
+
+def measure(_: hpman.HyperParameterManager, names, num_workers: int):
+    """Fork workers reading all hyperparameters; return the growth of their
+    USS in bytes."""
+    pids = []
+    for _i in range(num_workers):
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os.close(r)
+            before = read_uss()
+            work(_, names)
+            os.write(w, str(read_uss() - before).encode())
+            os._exit(0)
+        os.close(w)
+        pids.append((pid, r))
+
+    result = []
+    for pid, r in pids:
+        with os.fdopen(r) as f:
+            result.append(int(f.read()))
+        os.waitpid(pid, 0)
+    return result
+
+
+def report(label: str, uss) -> None:
+    print(
+        "{}: USS growth per worker {:.1f} MiB (max {:.1f} MiB)".format(
+            label, sum(uss) / len(uss) / 2 ** 20, max(uss) / 2 ** 20
+        )
+    )
+
+
+def main():
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    num_files = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    num_hps = int(sys.argv[3]) if len(sys.argv) > 3 else 150
+
+    _ = hpman.HyperParameterManager("_")
+    for filename, source in make_sources(num_files, num_hps):
+        _.parse_source(source, filename, keep_ast_nodes=False)
+    names = sorted(_.get_values())
+    print("hyperparameters: {}, workers: {}".format(len(names), num_workers))
+
+    report("not frozen", measure(_, names, num_workers))
+    _.freeze()
+    report("frozen", measure(_, names, num_workers))
+    _.seal()
+    report("sealed", measure(_, names, num_workers))
+
+    if not hasattr(gc, "freeze"):
+        return
+    _.unfreeze().freeze()
+    gc.collect()
+    gc.freeze()
+    report("frozen, gc frozen", measure(_, names, num_workers))
+    gc.unfreeze()
+    _.seal(gc_freeze=True)
+    report("sealed, gc frozen", measure(_, names, num_workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Throughput of reads of a :class:`hpman.HyperParameterManager` shared by
+threads, with and without a thread writing hyperparameters meanwhile.
+
+Usage: python3 benchmarks/bench_threads.py [duration_seconds]
+"""
+import sys
+import threading
+import time
+
+import hpman
+
+
+def build(num_groups: int = 100) -> hpman.HyperParameterManager:
+    _ = hpman.HyperParameterManager("_")
+    source = "\n".join(
+        "_('group{}.sub.lr', {})".format(i, i) for i in range(num_groups)
+    )
+    return _.parse_source(source)
+
+
+def bench(
+    _: hpman.HyperParameterManager, num_readers: int, write: bool, duration: float
+) -> None:
+    stop = threading.Event()
+    counts = [0] * num_readers
+
+    def reader(i):
+        n = 0
+        while not stop.is_set():
+            for _i in range(100):
+                _("group50.sub.lr")
+            n += 100
+        counts[i] = n
+
+    def writer():
+        step = 0
+        while not stop.is_set():
+            _.set_value("group{}.sub.lr".format(step % 100), step)
+            step += 1
+            time.sleep(0.0001)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(num_readers)]
+    if write:
+        threads.append(threading.Thread(target=writer))
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(
+        "{:>2} readers, {:>10}: {:10.0f} reads/s".format(
+            num_readers, "writing" if write else "no writer", sum(counts) / duration
+        )
+    )
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+    _ = build()
+    for num_readers in [1, 4]:
+        for write in [False, True]:
+            bench(_, num_readers, write, duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ from .__version__ import __author__, __author_email__, __title__, __url__, __ver
 from .hpm import (
     DoubleAssignmentException,
     EmptyValue,
+    FrozenManagerException,
     HyperParameterManager,
     ImpossibleTree,
     NotLiteralEvaluable,
@@ -15,8 +16,11 @@ from .hpm_db import (
     HyperParameterPriority,
     HyperParamNode,
     HyperParamTree,
+    HyperParamTreeView,
     P,
 )
+from .hpm_handle import HyperParameterHandle
+from .hpm_override import HyperParameterOverride
 
 # moneky patch to enable ``from hpman.m import whatever```
 from .hpm_zoo_monkey_patch import HPMZooModule
@@ -35,6 +39,8 @@ __all__ = [
     "__version__",
     "DoubleAssignmentException",
     "EmptyValue",
+    "FrozenManagerException",
+    "HyperParameterHandle",
     "HyperParameterManager",
     "NotLiteralEvaluable",
     "NotLiteralNameException",
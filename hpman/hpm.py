@@ -1,26 +1,99 @@
-import ast
-import glob
+import array
+import collections
+import collections.abc
+import concurrent.futures
+import functools
+import gc
+import itertools
 import os
-from typing import Any, Dict, Optional, Set, List
+import pickle
+import threading
+import weakref
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from .hpm_db import (
     HyperParameterOccurrence,
     HyperParameterPriority,
     HyperParamNode,
     HyperParamTree,
+    HyperParamTreeView,
     P,
+    TreeValues,
+    copy_tree_values,
+)
+from .hpm_handle import HyperParameterHandle
+from .hpm_import_hook import HyperParameterImportHook
+from .hpm_manifest import HyperParameterManifest, gc_paused
+from .hpm_override import (
+    HyperParameterOverride,
+    apply_overrides,
+    get_overrides,
+    overrides_under,
+)
+from .hpm_parser import (
+    CACHE_HIT,
+    SKIPPED,
+    ParseStatistics,
+    list_source_files,
+    may_contain_placeholder_call,
+    parse_file_occurrences,
+    parse_source_occurrences,
 )
 from .primitives import (
     DoubleAssignmentException,
     EmptyValue,
     FlatMapping,
+    FrozenManagerException,
     ImpossibleTree,
     NotLiteralEvaluable,
     NotLiteralNameException,
     Primitive,
     TreeMapping,
 )
-from .source_helper import SourceHelper
+from .hpm_shared import PreparedWrite, SharedValueTable
+from .hpm_watch import HyperParameterWatcher
+from .source_helper import Fingerprint, SourceHelper, file_fingerprint
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+def _synchronized(method: F) -> F:
+    """Run a method of :class:`HyperParameterManager` holding its writer lock."""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
+# Managers of the current process. Their locks are re-created in forked
+# children, as a lock held by another thread when forking would never be
+# released there.
+_managers = weakref.WeakSet()  # type: weakref.WeakSet[HyperParameterManager]
+
+
+def _after_fork_in_child() -> None:
+    for hpm in list(_managers):
+        hpm._lock = threading.RLock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
 
 # -- Data Structures
 # Data structure hierarchy:
@@ -46,6 +119,12 @@ class HyperParameterManager:
     by (A), (B), (C) three methods are of increasing priority; the latter may
     overwrite the value of the former one. We call it "Hyperparameter Value
     Trilogy"
+
+    A HyperParameterManager object can be shared by threads. Methods that
+    change hyperparameters are serialized by a lock, while reads do not
+    take any lock; a read concurrent with a write sees either the value
+    before the write or after it. The lock is re-created in processes
+    forked meanwhile.
     """
 
     placeholder = None  # type: str
@@ -60,6 +139,18 @@ class HyperParameterManager:
     """Tree style hyperparameter database. ANYTHING you want is here.
     """
 
+    parse_stats = None  # type: ParseStatistics
+    """Counters of parsed, skipped and cache-loaded sources.
+    """
+
+    pickle_level = "full"  # type: str
+    """Level of detail of the pickled object, one of
+    :data:`.hpm_db.PICKLE_LEVELS`, e.g. when it is sent to processes
+    started with ``spawn``. Workers that only read hyperparameters need
+    ``"values"``, which leaves out source code, ast nodes and occurrences
+    shadowed by others.
+    """
+
     def __init__(self, placeholder: str, separator: str = "."):
         """Create a hyperparameter manager.
 
@@ -74,52 +165,269 @@ class HyperParameterManager:
         assert len(separator) == 1
         self.separator = separator
 
+        # held by writers; readers are lock-free
+        self._lock = threading.RLock()
+        _managers.add(self)
+
         # The "Hyperparameter Value Triology"
         self.tree = HyperParamTree()
-
-    def parse_file(self, path: str) -> "HyperParameterManager":
+        self.parse_stats = ParseStatistics()
+
+        # filename -> occurrences parsed from that file, for retraction
+        self._file_occurrences = {}  # type: Dict[str, List[HyperParameterOccurrence]]
+
+        # path -> fingerprint of files parsed by parse_file, when they were read
+        self._parsed_files = {}  # type: Dict[str, Fingerprint]
+
+        # name -> (default, value, leaf tree, generation of the leaf tree) of
+        # the last __call__ with a default value
+        self._call_cache = {}  # type: Dict[str, Tuple[Any, Any, HyperParamTree, int]]
+
+        # lookup tables compiled by freeze()
+        self._frozen = None  # type: Optional[_FrozenTable]
+
+        # (generation of the tree, result of get_values)
+        self._values_cache = None  # type: Optional[Tuple[int, Dict[str, Any]]]
+
+        # whether override() has ever been entered; reads do not look up
+        # overrides until then
+        self._overridden = False
+
+        self._shared = None  # type: Optional[SharedValueTable]
+
+    def __reduce__(self):
+        """Pickle the tree of hyperparameters at :attr:`pickle_level`, and
+        whether the object is frozen; above ``"values"``, parse statistics and
+        fingerprints of parsed files as well. Neither overrides, which belong to
+        the context that enters them, nor the table shared by :meth:`share`
+        are pickled."""
+        level = self.pickle_level
+        with self._lock:
+            rows = self.tree.dump(level)
+        return (
+            _load_manager,
+            (
+                self.placeholder,
+                self.separator,
+                level,
+                rows,
+                self.parse_stats if level != "values" else None,
+                self.frozen,
+                dict(self._parsed_files) if level != "values" else None,
+            ),
+        )
+
+    @_synchronized
+    def parse_file(
+        self,
+        path: str,
+        *,
+        num_workers: Optional[int] = 1,
+        cache_dir: Optional[str] = None,
+        keep_ast_nodes: bool = True
+    ) -> "HyperParameterManager":
         """Parse given file to extract hyperparameter settings.
 
         :param path: The path to a python source code, directory, or a list of both
+        :param num_workers: number of worker processes used to read and parse
+            files. Files are parsed serially in the current process if it is 1,
+            and with ``os.cpu_count()`` workers if it is None. Results are
+            merged in the same order as serial parsing, so the resulting tree
+            and raised exceptions are identical.
+        :param cache_dir: opt-in directory of a persistent parse cache (see
+            :class:`.hpm_cache.ParseCache`). Files unchanged since they were
+            cached are not parsed (or even read) again.
+        :param keep_ast_nodes: whether occurrences keep references to the
+            parsed ast nodes, which keep the whole ast of every parsed file
+            alive. If False, ``ast_node`` of occurrences is parsed again on
+            demand from their ``source_span``. See also :meth:`compact`.
         :return: the object itself
         """
-        paths = None
-        if not isinstance(path, list):
-            paths = [path]
-        else:
-            paths = path
-
-        parsing_files = set()  # type: Set[str]
-        for _path in paths:
-            if os.path.isdir(_path):
-                for filename in sorted(
-                    glob.glob(os.path.join(_path, "**/*.py"), recursive=True)
-                ):  # sort for debugging stability
-                    if filename not in parsing_files:
-                        parsing_files.add(filename)
-            elif os.path.exists(_path):
-                # _path is a file
-                if _path not in parsing_files:
-                    parsing_files.add(_path)
-            else:
-                raise FileNotFoundError(_path)
-
-        for _file in sorted(parsing_files):  # sort for debugging stability
-            with open(_file) as f:
-                self.parse_source(f.read(), _file)
+        self._check_not_frozen()
+        files = list_source_files(path)
+        if num_workers is None:
+            num_workers = os.cpu_count() or 1
+        num_workers = min(num_workers, len(files))
+
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        if num_workers <= 1:
+            for _file in files:
+                self._push_parsed_file(
+                    _file,
+                    *parse_file_occurrences(
+                        _file, self.placeholder, cache_dir, keep_ast_nodes
+                    )
+                )
+            return self
+
+        chunksize = max(1, len(files) // (num_workers * 4))
+        with concurrent.futures.ProcessPoolExecutor(num_workers) as executor:
+            # ``map`` yields results (and re-raises worker exceptions) in
+            # submission order, which keeps merging deterministic.
+            results = executor.map(
+                parse_file_occurrences,
+                files,
+                itertools.repeat(self.placeholder),
+                itertools.repeat(cache_dir),
+                itertools.repeat(keep_ast_nodes),
+                chunksize=chunksize,
+            )
+            for _file, result in zip(files, results):
+                self._push_parsed_file(_file, *result)
+
+        return self
+
+    @_synchronized
+    def export_manifest(self, path: str) -> "HyperParameterManager":
+        """Write the occurrences parsed from all files by :meth:`parse_file`
+        to a manifest file (see :class:`.hpm_manifest.HyperParameterManifest`),
+        along with fingerprints and digests of the files. Jobs can then
+        rebuild the tree with :meth:`load_manifest` without reading or
+        parsing the sources. Sources parsed by :meth:`parse_source` and
+        values set in runtime are not exported.
+
+        :param path: path of the manifest file
+        :return: the object itself
+        """
+        HyperParameterManifest.build(
+            self.placeholder, self._parsed_files, self._file_occurrences
+        ).write(path)
+        return self
+
+    @_synchronized
+    def load_manifest(
+        self, path: str, *, check_stale: bool = True
+    ) -> "HyperParameterManager":
+        """Push the occurrences of a manifest written by
+        :meth:`export_manifest`, akin to parsing the same files with
+        :meth:`parse_file`. Loaded files are counted as cache hits in
+        :attr:`parse_stats`.
+
+        :param path: path of the manifest file
+        :param check_stale: whether to check the files for changes since they
+            were parsed (see
+            :meth:`.hpm_manifest.HyperParameterManifest.is_stale`). Stale
+            files are parsed again and deleted files are skipped. If False,
+            sources are not accessed at all.
+        :return: the object itself
+        """
+        self._check_not_frozen()
+        with gc_paused():
+            manifest = HyperParameterManifest.read(path)
+            if manifest.placeholder != self.placeholder:
+                raise ValueError(
+                    "Manifest `{}` is parsed with placeholder `{}` instead of "
+                    "`{}`.".format(path, manifest.placeholder, self.placeholder)
+                )
+
+            for filename in manifest.files:
+                if not check_stale:
+                    fingerprint = manifest.files[filename][0]
+                elif manifest.is_stale(filename):
+                    if os.path.isfile(filename):
+                        self._push_parsed_file(
+                            filename,
+                            *parse_file_occurrences(filename, self.placeholder)
+                        )
+                    continue
+                else:
+                    fingerprint = file_fingerprint(filename)
 
+                self._push_parsed_file(
+                    filename, fingerprint, manifest.occurrences(filename), CACHE_HIT
+                )
         return self
 
+    def watch(
+        self,
+        paths: Union[str, List[str]],
+        *,
+        interval: float = 1.0,
+        debounce: float = 0.2
+    ) -> HyperParameterWatcher:
+        """Keep hyperparameters in sync with edits of already parsed source
+        files in a background thread. Only files whose fingerprints (mtime
+        and size) change are reparsed, see :meth:`reparse_file`.
+
+        :param paths: file paths, directory names, or a list of both
+        :param interval: seconds between two polls
+        :param debounce: seconds that files must stay unchanged before a
+            burst of edits is applied
+
+        :return: the started watcher; call its ``stop`` method to stop watching
+        """
+        watcher = HyperParameterWatcher(
+            self, paths, interval=interval, debounce=debounce
+        )
+        watcher.start()
+        return watcher
+
+    def install_import_hook(
+        self,
+        paths: Union[str, List[str]],
+        *,
+        cache_dir: Optional[str] = None,
+        keep_ast_nodes: bool = True
+    ) -> HyperParameterImportHook:
+        """Parse python modules as they are imported from now on, instead of
+        parsing directories with :meth:`parse_file` up front: only the code
+        actually imported is parsed, and the source read by the import system
+        is reused. See :class:`.hpm_import_hook.HyperParameterImportHook`.
+
+        :param paths: only modules in these directories (or these files) are
+            parsed, e.g. the directory of the project; modules of third party
+            packages are never parsed unless they are listed
+        :param cache_dir: see :meth:`parse_file`
+        :param keep_ast_nodes: see :meth:`parse_file`
+
+        :return: the installed hook; call its ``uninstall`` method to stop
+            parsing imported modules
+        """
+        hook = HyperParameterImportHook(
+            self, paths, cache_dir=cache_dir, keep_ast_nodes=keep_ast_nodes
+        )
+        hook.install()
+        return hook
+
+    @_synchronized
+    def _push_imported_file(
+        self,
+        filename: str,
+        fingerprint: Fingerprint,
+        occurrences: List[HyperParameterOccurrence],
+        status: str,
+    ) -> None:
+        """Push the occurrences of a module imported through the import hook,
+        replacing those of a previous import (e.g. ``importlib.reload``).
+        Modules without any hyperparameter can be imported while frozen."""
+        if self._frozen is not None and (
+            occurrences or filename in self._file_occurrences
+        ):
+            raise FrozenManagerException(
+                "Hyperparameters of `{}` are frozen, but the imported module "
+                "`{}` changes them; import it before freezing, or call "
+                "unfreeze().".format(self.placeholder, filename)
+            )
+        self._replace_parsed_file(filename, fingerprint, occurrences, status)
+
     # parsing-time methods
     # TODO: flatten the underlying data structure (to something like a SQL table).
+    @_synchronized
     def parse_source(
-        self, source: str, filename: str = "<unknown>"
+        self,
+        source: str,
+        filename: str = "<unknown>",
+        *,
+        keep_ast_nodes: bool = True
     ) -> "HyperParameterManager":
         """Parse given string source to extract hyperparameter settings.
 
         :param source: a string of python code with correct line breakings
         :param filename: filename of the python code if have, which is used to
             set attribute of HyperParameter occurrence
+        :param keep_ast_nodes: see :meth:`parse_file`
 
         :note: The parsed results can be seen as a dict of the following structure:
 
@@ -181,77 +489,133 @@ class HyperParameterManager:
 
             1. if ``ast.literal_eval`` returns without exception, the the evaluated results are filled in the dict.
             2. otherwise a :class:`.primitives.NotLiteralEvaluable` sentinel object is filled
+
+            Sources that can not contain a call of the placeholder (see
+            :func:`.hpm_parser.may_contain_placeholder_call`) are skipped without
+            being parsed, and are counted in :attr:`parse_stats`.
         """
-        source_helper = SourceHelper(source)
-
-        root_node = ast.parse(source, filename)
-        for node in ast.walk(root_node):
-            if (
-                isinstance(node, ast.Call)
-                and isinstance(node.func, ast.Name)  # noqa
-                and (node.func.id == self.placeholder)  # noqa
-            ):
-                # Check the number of positional arguments
-                if len(node.args) < 1 or len(node.args) > 2:
-                    raise Exception(
-                        "number of positional args should be in range [1, 2], (was {} args), {}:L{}".format(
-                            len(node.args), filename, node.lineno
-                        )
-                    )
+        self._check_not_frozen()
+        if not may_contain_placeholder_call(source, self.placeholder):
+            self.parse_stats.num_skipped += 1
+            return self
+
+        occurrences = parse_source_occurrences(
+            source, filename, self.placeholder, keep_ast_nodes
+        )
+        self.parse_stats.num_parsed += 1
+        self._push_parsed_occurrences(filename, occurrences, SourceHelper(source))
+        return self
 
-                # Check hyperparameter name
-                if not isinstance(node.args[0], ast.Str):
-                    raise NotLiteralNameException(
-                        "hp-name should be literal-string: L{}".format(node.lineno)
-                    )
+    def _push_parsed_file(
+        self,
+        filename: str,
+        fingerprint: Fingerprint,
+        occurrences: List[HyperParameterOccurrence],
+        status: str,
+    ) -> None:
+        """Account and push the result of :func:`.hpm_parser.parse_file_occurrences`."""
+        self._account_parsed_file(filename, fingerprint, status)
+        # sources of files are not kept in memory, but read on demand
+        self._push_parsed_occurrences(
+            filename, occurrences, SourceHelper.lazy(filename, fingerprint)
+        )
+
+    def _replace_parsed_file(
+        self,
+        filename: str,
+        fingerprint: Fingerprint,
+        occurrences: List[HyperParameterOccurrence],
+        status: str,
+    ) -> None:
+        """Replace the occurrences previously parsed from a file by the result
+        of :func:`.hpm_parser.parse_file_occurrences`, see
+        :meth:`.hpm_db.HyperParamTree.replace_occurrences`. Nothing is
+        changed if the new occurrences can not be pushed."""
+        self.tree.replace_occurrences(
+            self._file_occurrences.get(filename, []),
+            occurrences,
+            source_helper=SourceHelper.lazy(filename, fingerprint),
+        )
+        if occurrences:
+            self._file_occurrences[filename] = list(occurrences)
+        else:
+            self._file_occurrences.pop(filename, None)
+        self._account_parsed_file(filename, fingerprint, status)
+
+    def _account_parsed_file(
+        self, filename: str, fingerprint: Fingerprint, status: str
+    ) -> None:
+        self._parsed_files[filename] = fingerprint
+        if status == SKIPPED:
+            self.parse_stats.num_skipped += 1
+        elif status == CACHE_HIT:
+            self.parse_stats.num_cache_hits += 1
+        else:
+            self.parse_stats.num_parsed += 1
 
-                # Literal evaluate the hyperparameter name
-                name = ast.literal_eval(node.args[0])
-                lineno = node.lineno
+    def _push_parsed_occurrences(
+        self,
+        filename: str,
+        occurrences: List[HyperParameterOccurrence],
+        source_helper: SourceHelper,
+    ) -> None:
+        """Push occurrences parsed from a single source into the tree."""
+        if not occurrences:
+            return
 
-                # Parse the name and the default value
-                ast_node = None
-                if len(node.args) == 2:
-                    ast_node = node.args[1]
+        # index before pushing so that a failed push can be retracted
+        self._file_occurrences.setdefault(filename, []).extend(occurrences)
 
-                    try:
-                        value = ast.literal_eval(node.args[1])
-                    except ValueError:
-                        value = NotLiteralEvaluable()
-                else:
-                    value = EmptyValue()
-
-                # Parse hints
-                # IMPORTANT: we demand hints to be literal evaluable (for now)
-                hints = {}
-                if hasattr(node, "keywords"):
-                    for k in node.keywords:
-                        try:
-                            v = ast.literal_eval(k.value)
-                        except ValueError:
-                            raise NotLiteralEvaluable(
-                                "Value of hint keyword `{}` is not literal evaluable: \n{}".format(
-                                    k.arg,
-                                    SourceHelper.format_given_filename_and_source_and_lineno(
-                                        filename, source, lineno
-                                    ),
-                                )
-                            )
-                        hints[k.arg] = v
-
-                # Construct an occurrence
-                occ = HyperParameterOccurrence(
-                    name=name,
-                    value=value,
-                    filename=filename,
-                    lineno=lineno,
-                    ast_node=ast_node,
-                    hints=hints,
-                    priority=P.PRIORITY_PARSED_FROM_SOURCE_CODE,
-                )
-                self.tree.push_occurrence(occ, source_helper=source_helper)
+        self.tree.push_occurrences(occurrences, source_helper=source_helper)
+
+    @_synchronized
+    def compact(self) -> "HyperParameterManager":
+        """Drop references of parsed occurrences to ast nodes, so that the
+        asts of parsed files can be garbage-collected. ``ast_node`` of these
+        occurrences is parsed again on demand from their ``source_span``.
 
-        self.tree.validate()
+        :return: the object itself
+        """
+        for occurrences in self._file_occurrences.values():
+            for occ in occurrences:
+                occ.ast_node = None
+        return self
+
+    @_synchronized
+    def forget_file(self, path: str) -> "HyperParameterManager":
+        """Retract all occurrences parsed from a file. Values set in runtime
+        are left untouched.
+
+        :param path: the file path, in the same form as it was parsed
+        :return: the object itself
+        """
+        self._check_not_frozen()
+        self._parsed_files.pop(path, None)
+        for occ in self._file_occurrences.pop(path, []):
+            self.tree.retract_occurrence(occ)
+        return self
+
+    @_synchronized
+    def reparse_file(self, path: str) -> "HyperParameterManager":
+        """Parse a file again after it is edited: occurrences previously
+        parsed from the file are replaced by the new ones. Values set in
+        runtime are left untouched. The cost scales with the size of the
+        file rather than that of the whole tree.
+
+        The file is parsed before the tree is touched, and hyperparameters
+        found in both contents never go missing for lock-free readers in the
+        meantime (see :meth:`.hpm_db.HyperParamTree.replace_occurrences`).
+        If the new content can not be parsed or conflicts with other
+        occurrences, the previous occurrences are kept and the exception is
+        re-raised.
+
+        :param path: the file path, in the same form as it was parsed
+        :return: the object itself
+        """
+        self._check_not_frozen()
+        self._replace_parsed_file(
+            path, *parse_file_occurrences(path, self.placeholder)
+        )
         return self
 
     # runtime methods
@@ -260,10 +624,114 @@ class HyperParameterManager:
 
         :param hp_name: The name of the hyperparameter
         """
-        value = self.get_value(hp_name, raise_exception=False)
-        if isinstance(value, EmptyValue):
+        if self._shared is not None:
+            self._sync_shared()
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides and (
+            hp_name in overrides or overrides_under(overrides, hp_name, self.separator)
+        ):
+            return True
+
+        frozen = self._frozen
+        if frozen is not None and hp_name in frozen.values:
+            return True
+
+        tree = self.tree.get(hp_name)
+        if tree is None:
             return False
-        return True
+        if tree.children:
+            return True
+        node = tree.node
+        return node is not None and not node.empty
+
+    def is_leaf_name(self, hp_name: str) -> bool:
+        """Whether a hyperparameter exists and has a value that is not a tree
+        of other hyperparameters.
+
+        :param hp_name: The name of the hyperparameter
+        """
+        if self._shared is not None:
+            self._sync_shared()
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides:
+            if hp_name in overrides:
+                return True
+            if overrides_under(overrides, hp_name, self.separator):
+                return False
+
+        frozen = self._frozen
+        if frozen is not None:
+            if hp_name in frozen.flat:
+                return True
+            if frozen.trees.get(hp_name):
+                return False
+
+        tree = self.tree.get(hp_name)
+        if tree is None or tree.children:
+            return False
+        node = tree.node
+        return node is not None and not node.empty
+
+    def is_branch_name(self, hp_name: str) -> bool:
+        """Whether a name is the prefix of a tree of hyperparameters, i.e.
+        the value of ``hp_name`` is a dict of the values of ``hp_name.*``.
+
+        :param hp_name: The name of the prefix
+        """
+        if self._shared is not None:
+            self._sync_shared()
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides:
+            if hp_name in overrides:
+                return False
+            if overrides_under(overrides, hp_name, self.separator):
+                return True
+
+        frozen = self._frozen
+        if frozen is not None:
+            if frozen.trees.get(hp_name):
+                return True
+            if hp_name in frozen.flat:
+                return False
+
+        tree = self.tree.get(hp_name)
+        return tree is not None and bool(tree.children)
+
+    def count(self, prefix: str = "") -> int:
+        """Get the number of hyperparameters with a value under a prefix, in
+        constant time.
+
+        :param prefix: the subtree prefix. If prefix is empty, all
+            hyperparameters are counted.
+        """
+        if self._shared is not None:
+            self._sync_shared()
+        frozen = self._frozen
+        num_leaves = frozen.counts.get(prefix) if frozen is not None else None
+        if num_leaves is None:
+            tree = self.tree.get(prefix)
+            num_leaves = tree.num_leaves if tree is not None else 0
+
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides:
+            num_leaves += self._count_new_overrides(prefix, overrides)
+        return num_leaves
+
+    def _count_new_overrides(self, prefix: str, overrides: Dict[str, Any]) -> int:
+        """Number of hyperparameters under a prefix that only have a value
+        because of overrides."""
+        names = [prefix] if prefix in overrides else []
+        names += [
+            self.separator.join([prefix, k]) if prefix else k
+            for k, _v in overrides_under(overrides, prefix, self.separator)
+        ]
+        num_new = 0
+        for name in names:
+            tree = self.tree.get(name)
+            node = tree.node if tree is not None else None
+            if node is None or node.empty:
+                num_new += 1
+        return num_new
 
     def get_value(self, name: str, raise_exception: bool = True) -> TreeMapping:
         """Get the authoritative value of a hyperparameter.
@@ -278,15 +746,21 @@ class HyperParameterManager:
             an :class:`.primitives.EmptyValue` object is returned.
         """
 
-        tree = self.tree.get(name)
+        if self._shared is not None:
+            self._sync_shared()
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides:
+            val = self._get_overridden_value(name, overrides)
+        else:
+            frozen = self._frozen
+            if frozen is not None:
+                try:
+                    return copy_tree_values(frozen.values[name])
+                except KeyError:
+                    # missing, or an unusual spelling of an existing name
+                    pass
 
-        if tree is None or tree.empty:
-            val = EmptyValue()  # type: ignore
-        elif tree.is_leaf():
-            assert tree.node is not None
-            val = tree.node.value  # type: ignore
-        elif tree.is_branch():
-            val = tree.tree_values()  # type: ignore
+            val = copy_tree_values(self._get_tree_value(self.tree.get(name)))
 
         if isinstance(val, EmptyValue):
             if raise_exception:
@@ -294,6 +768,57 @@ class HyperParameterManager:
 
         return val  # type: ignore
 
+    def _get_tree_value(self, tree: Optional[HyperParamTree]) -> TreeMapping:
+        """Get the value of a (sub)tree; an :class:`.primitives.EmptyValue`
+        object if there is none. Values of branches are cached and shared,
+        see :func:`.hpm_db.copy_tree_values`.
+        """
+        if tree is None:
+            return EmptyValue()  # type: ignore
+
+        if tree.children:
+            assert tree.is_valid(strict=False)
+            return tree._tree_values(annotate_dict=False)
+
+        node = tree.node
+        if node is None:
+            return EmptyValue()  # type: ignore
+        return node.value
+
+    def _get_overridden_value(self, name: str, overrides: Dict[str, Any]) -> Any:
+        """Get the value of a name with overrides of the current context."""
+        try:
+            return overrides[name]
+        except KeyError:
+            pass
+
+        tree = self.tree.get(name)
+        val = self._get_tree_value(tree)
+        if tree is not None and not tree.children and not isinstance(val, EmptyValue):
+            return val  # a leaf
+
+        items = overrides_under(overrides, name, self.separator)
+        if not items:
+            return copy_tree_values(val)
+        if isinstance(val, EmptyValue):
+            val = {}
+        return apply_overrides(copy_tree_values(val), items, self.separator)
+
+    def handle(self, name: str) -> HyperParameterHandle:
+        """Get a handle bound to a hyperparameter. Reading its ``value`` (or
+        calling it) returns the same as :meth:`get_value`, but without
+        looking up the name again unless the hyperparameter has been written
+        since the last read. Use it to hoist lookups out of hot loops::
+
+            lr = _.handle("optimizer.lr")
+            for batch in data:
+                step(batch, lr=lr.value)  # sees later _.set_value(...) calls
+
+        :param name: The name of the hyperparameter. It does not have to
+            exist yet.
+        """
+        return HyperParameterHandle(self, name)
+
     def get_occurrence(self, name: str) -> Optional[HyperParameterOccurrence]:
         """
         :param hp_name: The name of the hyperparameter
@@ -301,25 +826,54 @@ class HyperParameterManager:
         :return: a :class:`.hpm_db.HyperParameterOccurrence` object or None
         """
 
+        if self._shared is not None:
+            self._sync_shared()
+        frozen = self._frozen
+        if frozen is not None and name in frozen.occurrences:
+            return frozen.occurrences[name]
+
         tree = self.tree.get(name)
-        if tree is None or tree.empty:
+        if tree is None or tree.children:
             return None
 
-        if tree.is_leaf():
-            assert tree.node is not None
-            return tree.node.get()
-
-        return None
+        node = tree.node
+        if node is None:
+            return None
+        return node.get()
 
     def get_values(self) -> FlatMapping:
         """Get all current available hyperparameters and their values.
 
-        :return: dict of name to value.
+        :return: a new dict of name to value, copied from a cache that is
+            kept until the next write.
         """
-
-        return {
-            node.get().name: node.value for node in self.tree.flatten()  # type: ignore
+        if self._shared is not None:
+            self._sync_shared()
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides:
+            values = dict(self._get_values())
+            values.update(overrides)
+            return values
+
+        return dict(self._get_values())
+
+    def _get_values(self) -> FlatMapping:
+        # the result is shared by all callers and must not be mutated
+        frozen = self._frozen
+        if frozen is not None:
+            return frozen.flat
+
+        # read before flattening, see HyperParamTree._tree_values
+        generation = self.tree.generation
+        cached = self._values_cache
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        values = {
+            node.name: node.value for node in self.tree.flatten()  # type: ignore
         }
+        self._values_cache = (generation, values)
+        return values
 
     def get_nodes(self) -> List[HyperParamNode]:
         """Get all current available hyperparameters and their values.
@@ -336,7 +890,34 @@ class HyperParameterManager:
           add a dict annotation so it can be safely convert back to the same
           tree structure. This is often used for safe serialization
           (e.g. dump as yaml).
+
+        :return: a new nested dict of values, copied from a cache that is
+            kept until the subtree is written. Values of leaves are not
+            copied, except dicts annotated with ``annotate_dict``.
         """
+        if self._shared is not None:
+            self._sync_shared()
+        overrides = get_overrides(self) if self._overridden else None
+        if overrides:
+            items = overrides_under(overrides, prefix, self.separator)
+            if items:
+                return apply_overrides(
+                    self._get_tree(prefix, annotate_dict),
+                    items,
+                    self.separator,
+                    annotate_dict,
+                )
+
+        return self._get_tree(prefix, annotate_dict)
+
+    def _get_tree(self, prefix: str, annotate_dict: bool) -> TreeMapping:
+        frozen = self._frozen
+        if frozen is not None and not annotate_dict:
+            try:
+                return copy_tree_values(frozen.trees[prefix])
+            except KeyError:
+                pass
+
         if self.tree.empty:
             return {}
 
@@ -351,17 +932,72 @@ class HyperParameterManager:
 
         return tree.tree_values(annotate_dict=annotate_dict)
 
+    def view(self, prefix: str = "") -> HyperParamTreeView:
+        """Get a read-only mapping view of the subtree of prefix. Unlike
+        :meth:`get_tree`, nothing is copied: keys and values are read from
+        the live tree on access, and nested subtrees are views as well (see
+        :class:`.hpm_db.HyperParamTreeView`). Views do not reflect
+        :meth:`override`.
+
+        :param prefix: the subtree prefix. If prefix is empty, the view is
+            of the top tree.
+        """
+        if self._shared is not None:
+            self._sync_shared()
+        tree = self.tree.get(prefix)
+        if tree is None or (prefix and tree.is_leaf()):
+            raise KeyError("`{}` is not a tree of hyperparameters".format(prefix))
+
+        return tree.view()
+
+    @_synchronized
     def set_value(self, name: str, value: Primitive) -> "HyperParameterManager":
         """Runtime setter. Set value with the highest priority."""
+        self._check_not_frozen()
+        prepared = self._prepare_shared({name: value})
         self.tree[name] = value
+        if prepared is not None:
+            self._shared.commit(prepared)  # type: ignore
         return self
 
+    @_synchronized
     def set_values(self, values: FlatMapping) -> "HyperParameterManager":
         """Runtime setter. Set a dict of values with the highest priority."""
-        for k, v in values.items():
-            self.tree[k] = v
+        self._check_not_frozen()
+        prepared = self._prepare_shared(values)
+        applied = []  # type: List[str]
+        try:
+            for k, v in values.items():
+                self.tree[k] = v
+                applied.append(k)
+        finally:
+            if prepared is not None:
+                self._commit_shared(prepared, values, applied)
         return self
 
+    def _commit_shared(
+        self, prepared: PreparedWrite, values: FlatMapping, applied: List[str]
+    ) -> None:
+        """Publish exactly the writes that have been applied to the tree, so
+        that a batch failing halfway is seen by other processes as it is seen
+        by the owner."""
+        if len(applied) < len(values):
+            if not applied:
+                return
+            prepared = self._shared.prepare(  # type: ignore
+                {k: values[k] for k in applied}
+            )
+        self._shared.commit(prepared)  # type: ignore
+
+    def _prepare_shared(self, values: FlatMapping) -> Optional[PreparedWrite]:
+        """Prepare the publication of writes to the shared table before they
+        are applied, so that writes that can not be shared (e.g. too large,
+        or not picklable) raise without changing anything."""
+        if self._shared is not None and self._shared.is_owner():
+            return self._shared.prepare(values)
+        return None
+
+    @_synchronized
     def set_tree(
         self, tree_values: TreeMapping, prefix: str = ""
     ) -> "HyperParameterManager":
@@ -376,6 +1012,7 @@ class HyperParameterManager:
         :param prefix: the subtree prefix of hyperparameter tree to set.
             If prefix is empty, the top tree will be set.
         """
+        self._check_not_frozen()
         if not isinstance(prefix, str):
             raise TypeError("Tree prefix must be a string.")
 
@@ -384,6 +1021,8 @@ class HyperParameterManager:
                 acc[key] = tv
                 return
             elif HyperParamTree.DICT_ANNOTATION in tv:
+                # do not modify the given dict, which may be from get_tree
+                tv = tv.copy()
                 is_dict = tv.pop(HyperParamTree.DICT_ANNOTATION)
                 if is_dict:
                     acc[key] = tv
@@ -404,16 +1043,368 @@ class HyperParameterManager:
 
         return self.set_values(flat_tree)
 
+    def override(self, values: FlatMapping) -> HyperParameterOverride:
+        """Override values of hyperparameters temporarily in the current
+        context, above all other priorities::
+
+            with _.override({"optimizer.lr": 0.01}):
+                train()  # _("optimizer.lr") is 0.01
+
+            async def evaluate(variant):
+                async with _.override(variant):
+                    ...
+
+        Overrides are scoped by :mod:`contextvars` (by threads before python
+        3.7): concurrent asyncio tasks and threads each see their own
+        overrides, while sharing the same tree of hyperparameters, which is
+        not copied. Reading an overridden name costs a dict lookup; reads of
+        trees copy the dicts on the routes to overridden values. Nested
+        overrides are layered on top of outer ones.
+
+        :param values: flat dict of name to value, akin to :meth:`set_values`
+        :return: a context manager, which can be used with both ``with`` and
+            ``async with``. Create one per scope.
+        """
+        return HyperParameterOverride(self, values)
+
+    @_synchronized
+    def share(self, size: int = 1 << 20) -> "HyperParameterManager":
+        """Share values written by setters (:meth:`set_value`,
+        :meth:`set_values` and :meth:`set_tree`) with forked child processes,
+        e.g. workers of a data loader.
+
+        Writes of the current process are published to an anonymous shared
+        memory region (see :class:`.hpm_shared.SharedValueTable`), which
+        child processes check on every read, so that they see the values
+        written by the parent after they are forked, without any IPC
+        round-trip. Writes of child processes stay local to them. Must be
+        called before forking. Setters of values that can not be pickled, or
+        that do not fit in the region, raise without writing anything.
+
+        :param size: bytes of the shared memory region
+        :return: the object itself
+        """
+        if self._shared is None:
+            self._shared = SharedValueTable(size)
+        return self
+
+    def _sync_shared(self) -> None:
+        """Apply values written by the owner of the shared table, if the
+        current process is a child of it."""
+        shared = self._shared
+        # lock-free in the common case, where nothing is new
+        if shared.is_owner() or not shared.has_updates():  # type: ignore
+            return
+
+        with self._lock:
+            values = shared.poll()  # type: ignore
+            if not values:
+                return
+            for k, v in values.items():
+                self.tree[k] = v
+            if self._frozen is not None:
+                sealed = isinstance(self._frozen.values, _PackedValues)
+                self._frozen = None
+                self.freeze()
+                if sealed:
+                    self.seal()
+
+    @_synchronized
+    def freeze(self) -> "HyperParameterManager":
+        """Compile the current values into an immutable lookup table, for
+        jobs that never change hyperparameters after startup.
+
+        While frozen, :meth:`get_value`, :meth:`get_tree` (without
+        ``annotate_dict``), :meth:`exists` and calling the manager are plain
+        dict lookups; values of branches are precomputed, and copied on
+        reads. Writes, i.e. setters, parsing,
+        :meth:`forget_file`, :meth:`reparse_file` and calls with a default
+        value of a hyperparameter that does not exist, raise
+        :class:`.primitives.FrozenManagerException`. Calls with a default
+        value of an existing hyperparameter return its frozen value.
+
+        :return: the object itself
+        """
+        table = _FrozenTable(
+            values={}, trees={"": TreeValues()}, flat={}, counts={"": 0}, occurrences={}
+        )
+
+        def _compile(tree: HyperParamTree, name: str, value: Any):
+            if not isinstance(value, EmptyValue):
+                table.values[name] = value
+            table.counts[name] = tree.num_leaves
+            if isinstance(value, dict) and tree.is_branch():
+                table.trees[name] = value
+                for k, child in tree.children.items():
+                    child_name = self.separator.join([name, k]) if name else k
+                    _compile(child, child_name, value[k])
+            elif tree.node is not None:
+                table.occurrences[name] = tree.node.get()
+                if not isinstance(value, EmptyValue):
+                    table.flat[name] = value
+
+        root = self.tree
+        if not root.empty:
+            _compile(root, "", self._get_tree_value(root))
+
+        self._frozen = table
+        return self
+
+    @_synchronized
+    def seal(self, gc_freeze: bool = False) -> "HyperParameterManager":
+        """Freeze the manager (see :meth:`freeze`) and pack its values,
+        before forking worker processes that only read hyperparameters, e.g.
+        data loader workers.
+
+        Reading through the tree of hyperparameters, or the lookup tables of
+        :meth:`freeze`, touches the reference counts of many small objects,
+        which dirties copy-on-write pages shared with the parent in every
+        worker. Once sealed, values (of leaves and branches) are pickled
+        into a single bytes object and unpickled on reads, see
+        :class:`_PackedValues`; per-node caches are dropped. Reads are a bit
+        slower than when frozen, as they return new objects; occurrences
+        are not packed.
+
+        Garbage collections in the workers still walk all objects of the
+        tree, see ``gc_freeze`` and ``benchmarks/bench_seal.py``.
+
+        :param gc_freeze: also move all objects tracked by the garbage
+            collector, i.e. the whole tree, to the permanent generation with
+            :func:`gc.freeze` (python 3.7+), so that collections in the
+            workers do not write to their pages. Off by default, as this
+            affects all objects of the process, not only the ones of the
+            manager.
+        :return: the object itself
+        """
+        if self._frozen is None:
+            self.freeze()
+        frozen = self._frozen
+        assert frozen is not None
+        if not isinstance(frozen.values, _PackedValues):
+            values = dict(frozen.trees)
+            values.update(frozen.values)
+            packed = _PackedValues.pack(values)
+            self._frozen = frozen._replace(
+                values=packed.subset(frozen.values),
+                trees=packed.subset(frozen.trees),
+                flat=packed.subset(frozen.flat),
+            )
+
+        def _drop_caches(tree: HyperParamTree):
+            tree._values_cache = None
+            for child in tree.children.values():
+                _drop_caches(child)
+
+        _drop_caches(self.tree)
+        self._values_cache = None
+        self._call_cache.clear()
+
+        # collect the tables replaced by packed values now, rather than in
+        # every worker
+        gc.collect()
+        if gc_freeze and hasattr(gc, "freeze"):
+            gc.freeze()
+        return self
+
+    @_synchronized
+    def unfreeze(self) -> "HyperParameterManager":
+        """Drop the lookup table compiled by :meth:`freeze` and accept
+        writes again.
+
+        :return: the object itself
+        """
+        self._frozen = None
+        return self
+
+    @property
+    def frozen(self) -> bool:
+        """Whether the manager is frozen, see :meth:`freeze`."""
+        return self._frozen is not None
+
+    def _check_not_frozen(self) -> None:
+        if self._frozen is not None:
+            raise FrozenManagerException(
+                "Hyperparameters of `{}` are frozen; call unfreeze() "
+                "before changing them.".format(self.placeholder)
+            )
+
     def __call__(self, hp_name: str, hp_value: EmptyValue = EmptyValue(), **hints):
         """Runtime callable setter and getter. Will set the value with
         intermediate priority.
+
+        Calls with a default value are memoized: as long as the hyperparameter
+        is not written by any other means, calling again with the same
+        default (e.g. from a line of code executed in a loop) returns the
+        resolved value right away.
         """
+        if self._shared is not None:
+            self._sync_shared()
         # TODO: record runtime meta-info (filename, lineno, etc.) as well
         # XXX: recording TOO MUCH in runtime may harm performance
-        if not isinstance(hp_value, EmptyValue):
+        if self._overridden and get_overrides(self):
+            if not isinstance(hp_value, EmptyValue):
+                # the default is recorded as usual, but shadowed by overrides
+                self._call_with_default(hp_name, hp_value)
+            return self.get_value(hp_name)
+
+        frozen = self._frozen
+        if frozen is not None:
+            try:
+                return copy_tree_values(frozen.values[hp_name])
+            except KeyError:
+                pass
+
+        if isinstance(hp_value, EmptyValue):
+            return self.get_value(hp_name)
+
+        return self._call_with_default(hp_name, hp_value)
+
+    def _call_with_default(self, hp_name: str, hp_value: Any) -> Any:
+        """Record the default value of a call, and get the value of the
+        hyperparameter, regardless of overrides."""
+        frozen = self._frozen
+        if frozen is not None:
+            # the default has been taken into account when parsing; a
+            # hyperparameter unknown when frozen can not be defined anymore
+            try:
+                return copy_tree_values(frozen.values[hp_name])
+            except KeyError:
+                self._check_not_frozen()
+
+        entry = self._call_cache.get(hp_name)
+        if entry is not None:
+            default, value, leaf, generation = entry
+            if leaf.generation == generation and _is_same_default(default, hp_value):
+                return value
+
+        with self._lock:
+            if self._frozen is not None:  # frozen by another thread meanwhile
+                return self._call_with_default(hp_name, hp_value)
+
             self.tree.push_occurrence(
                 HyperParameterOccurrence(
                     name=hp_name, value=hp_value, priority=P.PRIORITY_SET_FROM_CALLABLE
                 )
             )
-        return self.get_value(hp_name)
+            tree = self.tree.get(hp_name)
+            value = self._get_tree_value(tree)
+            if tree is not None and tree.is_leaf():
+                self._call_cache[hp_name] = (hp_value, value, tree, tree.generation)
+            return copy_tree_values(value)
+
+
+def _load_manager(
+    placeholder: str,
+    separator: str,
+    level: str,
+    rows: List[Any],
+    parse_stats: Optional[ParseStatistics],
+    frozen: bool,
+    parsed_files: Optional[Dict[str, Fingerprint]] = None,
+) -> HyperParameterManager:
+    """Rebuild a manager pickled by
+    :meth:`HyperParameterManager.__reduce__`."""
+    hpm = HyperParameterManager(placeholder, separator)
+    hpm.pickle_level = level
+    hpm.tree = HyperParamTree.load(rows, hpm.tree.sep)
+    if parse_stats is not None:
+        hpm.parse_stats = parse_stats
+    if parsed_files is not None:
+        hpm._parsed_files = parsed_files
+    if level != "values":
+        for tree in hpm.tree._index.values():  # type: ignore
+            node = tree.node
+            for occ in node._parsed if node is not None else []:
+                if occ.filename is not None:
+                    hpm._file_occurrences.setdefault(occ.filename, []).append(occ)
+    if frozen:
+        hpm.freeze()
+    return hpm
+
+
+_FrozenTable = collections.namedtuple(
+    "_FrozenTable", ["values", "trees", "flat", "counts", "occurrences"]
+)
+"""Lookup tables compiled by :meth:`HyperParameterManager.freeze`: name ->
+value of all names with a value, prefix -> dict of values of branches, name
+-> value of leaves (i.e. :meth:`HyperParameterManager.get_values`), name ->
+number of leaves with a value, and name -> occurrence of leaves."""
+
+
+class _PackedValues(collections.abc.Mapping):
+    """A read-only mapping of name -> value packed by
+    :meth:`HyperParameterManager.seal`. Values are pickled one after another
+    into a single bytes object, with their offsets in a single array, and
+    unpickled on every read: reads return new objects and do not touch the
+    reference counts of packed values. Values that can not be pickled are
+    kept as they are.
+    """
+
+    def __init__(
+        self,
+        blob: bytes,
+        offsets: array.array,
+        index: Dict[str, int],
+        unpacked: Dict[str, Any],
+    ) -> None:
+        self._blob = blob
+        self._offsets = offsets
+        self._index = index
+        self._unpacked = unpacked
+
+    @classmethod
+    def pack(cls, values: Dict[str, Any]) -> "_PackedValues":
+        """
+        :param values: dict of name -> value; dicts of values of branches
+            are packed as plain dicts, see :func:`.hpm_db.copy_tree_values`
+        """
+        chunks = []  # type: List[bytes]
+        offsets = array.array("Q", [0])
+        index = {}  # type: Dict[str, int]
+        unpacked = {}  # type: Dict[str, Any]
+        for name, value in values.items():
+            try:
+                chunk = pickle.dumps(
+                    copy_tree_values(value), protocol=pickle.HIGHEST_PROTOCOL
+                )
+            except (pickle.PicklingError, TypeError, AttributeError):
+                unpacked[name] = value
+                continue
+            index[name] = len(chunks)
+            chunks.append(chunk)
+            offsets.append(offsets[-1] + len(chunk))
+        return cls(b"".join(chunks), offsets, index, unpacked)
+
+    def subset(self, names: Iterable[str]) -> "_PackedValues":
+        """A mapping of some of the names, sharing the packed values."""
+        index = {k: self._index[k] for k in names if k in self._index}
+        unpacked = {k: self._unpacked[k] for k in names if k in self._unpacked}
+        return type(self)(self._blob, self._offsets, index, unpacked)
+
+    def __getitem__(self, name: str) -> Any:
+        try:
+            i = self._index[name]
+        except KeyError:
+            return self._unpacked[name]
+        return pickle.loads(self._blob[self._offsets[i] : self._offsets[i + 1]])
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index or name in self._unpacked
+
+    def __iter__(self) -> Iterator[str]:
+        return itertools.chain(self._index, self._unpacked)
+
+    def __len__(self) -> int:
+        return len(self._index) + len(self._unpacked)
+
+
+# float is left out on purpose, since 0.0 == -0.0
+_IMMUTABLE_TYPES = frozenset([int, str, bytes, bool, type(None)])
+
+
+def _is_same_default(a: Any, b: Any) -> bool:
+    """Whether pushing b as a default value has the same effect as pushing a."""
+    if a is b:
+        return True
+    # a default of a literal of an immutable type may be a new object each time
+    return type(a) is type(b) and type(a) in _IMMUTABLE_TYPES and a == b
@@ -0,0 +1,143 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Any, List, Mapping, Optional, Tuple
+
+from .__version__ import __version__
+from .hpm_db import HyperParameterOccurrence, P
+from .source_helper import Fingerprint, file_fingerprint
+
+
+class ParseCache:
+    """On-disk cache of the occurrences parsed from source files.
+
+    One entry is stored per source file, keyed by the absolute path of the
+    file, the placeholder name and the hpman version; an entry is only used
+    if the fingerprint (mtime and size) of the file is unchanged. Entries are
+    written to a temporary file and atomically renamed, so the cache can be
+    shared by several processes (e.g. all ranks of a distributed job)
+    reading and writing it at the same time.
+
+    :note: Entries are pickled; only point ``cache_dir`` to a trusted location.
+    """
+
+    FORMAT_VERSION = 2
+    """Version of the entry format. Bump it whenever the layout changes."""
+
+    def __init__(self, cache_dir: str, placeholder: str) -> None:
+        """
+        :param cache_dir: directory to store the cache entries. Will be created
+            if it does not exist.
+        :param placeholder: placeholder name the cached files are parsed with
+        """
+        self.cache_dir = cache_dir
+        self.placeholder = placeholder
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, path: str) -> Tuple:
+        return (
+            self.FORMAT_VERSION,
+            __version__,
+            self.placeholder,
+            os.path.abspath(path),
+        )
+
+    def _entry_path(self, path: str) -> str:
+        digest = hashlib.sha1(repr(self._key(path)).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".pkl")
+
+    def load(
+        self, path: str, fingerprint: Fingerprint
+    ) -> Optional[List[HyperParameterOccurrence]]:
+        """Load the occurrences of a file if there is a valid entry.
+
+        :param path: path of the source file
+        :param fingerprint: current fingerprint of the source file
+
+        :return: the cached occurrences, or None on cache miss
+        """
+        try:
+            with open(self._entry_path(path), "rb") as f:
+                key, entry_fingerprint, rows = pickle.load(f)
+        except Exception:
+            # missing, partially written by an old version, or corrupted
+            return None
+
+        if key != self._key(path) or tuple(entry_fingerprint) != tuple(fingerprint):
+            return None
+
+        return rows_to_occurrences(path, rows)
+
+    def store(
+        self,
+        path: str,
+        fingerprint: Fingerprint,
+        occurrences: List[HyperParameterOccurrence],
+    ) -> None:
+        """Store the occurrences of a file. Failures (e.g. unpicklable values
+        or a read-only cache directory) are silently ignored.
+
+        :param path: path of the source file
+        :param fingerprint: fingerprint of the source file when it was read
+        :param occurrences: occurrences parsed from the file
+        """
+        rows = occurrences_to_rows(occurrences)
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    (self._key(path), fingerprint, rows),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, self._entry_path(path))
+        except Exception:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+Row = Tuple[str, Any, Optional[int], Optional[Tuple], Optional[Mapping[str, Any]]]
+
+
+def occurrences_to_rows(occurrences: List[HyperParameterOccurrence]) -> List[Row]:
+    """Convert occurrences parsed from a file into picklable rows of (name,
+    value, lineno, source span, hints), e.g. to be stored in a
+    :class:`ParseCache`.
+    """
+    return [
+        (
+            occ.name,
+            occ.value,
+            occ.lineno,
+            occ.source_span,
+            occ.hints,
+        )
+        for occ in occurrences
+    ]
+
+
+def rows_to_occurrences(path: str, rows: List[Row]) -> List[HyperParameterOccurrence]:
+    """Convert rows of :func:`occurrences_to_rows` back into occurrences.
+
+    :param path: path of the source file the occurrences are parsed from
+    :param rows: rows of the occurrences
+    """
+    return [
+        HyperParameterOccurrence(
+            name=name,
+            value=value,
+            filename=path,
+            lineno=lineno,
+            source_span=source_span,
+            hints=hints,
+            priority=P.PRIORITY_PARSED_FROM_SOURCE_CODE,
+        )
+        for name, value, lineno, source_span, hints in rows
+    ]
@@ -1,14 +1,18 @@
 import ast
+import collections.abc
 import enum
+import sys
 from typing import (
     Any,
     Callable,
     Dict,
+    Iterable,
     Iterator,
     List,
     Mapping,
     Optional,
     Sequence,
+    Tuple,
     Union,
 )
 
@@ -25,47 +29,143 @@ class HyperParameterPriority(enum.IntEnum):
 P = HyperParameterPriority
 
 
-class HyperParameterOccurrence:
-    """A single occurrence of a statically pasred hyperparameter."""
+class _EmptyHints(dict):
+    """Type of :data:`EMPTY_HINTS`: an empty dict that can not be changed,
+    and is pickled and copied as the shared object itself."""
 
-    name = None  # type: str
-    """Name of the hyperparameter"""
+    __slots__ = ()
 
-    value = EmptyValue()
-    """Value of the hyperparameter. An instance of :class:`.primitives.EmptyValue`
-    should present if value is not set."""
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("EMPTY_HINTS can not be changed")
 
-    priority = None  # type: HyperParameterPriority
-    """Priority of this hyperparameter occurrence. The value of the highest
-    priority of all the occurrences of the same hyperparameter will be denoted
-    as "the value of this hyperparameter". See :class:`HyperParameterPriority`
-    for details about the meaning of each priority.
-    """
+    __setitem__ = __delitem__ = __ior__ = _immutable  # type: ignore
+    clear = pop = popitem = setdefault = update = _immutable  # type: ignore
 
-    filename = None  # type: str
-    """Filename in which this hyperparameter occurs. Will only present in
-    parsed hyperparameters"""
+    def __reduce__(self):
+        return "EMPTY_HINTS"
 
-    lineno = None  # type: int
-    """In which line of the file this hyperparameter occurs. Will only present
-    in parsed hyperparameters """
 
-    ast_node = None  # type: ast.AST
-    """The parsed `ast.AST` object of this occurrence. Will only present
-    in parsed hyperparameters"""
+EMPTY_HINTS = _EmptyHints()  # type: Mapping[str, Any]
+"""Immutable empty hints shared by all occurrences parsed without hints."""
 
-    hints = None  # type: Dict[str, Any]
-    """Hints provided by user of this occurrence of the hyperparameter.  Will
-    only present in parsed hyperparameters """
+PICKLE_LEVELS = ("values", "locations", "full")
+"""Levels of detail of pickled trees of hyperparameters, see
+:meth:`HyperParamTree.dump`:
 
-    source_helper = None  # type: SourceHelper
-    """Source infomation and helper functions for this occurrence.
-    """
+- ``"values"``: the occurrence with the highest priority of each
+  hyperparameter, with its name, value and priority only;
+- ``"locations"``: all occurrences, with their filenames, line numbers,
+  source spans and hints as well, but neither source code nor ast nodes;
+- ``"full"``: all occurrences as they are.
+"""
+
+
+class HyperParameterOccurrence:
+    """A single occurrence of a statically pasred hyperparameter."""
+
+    __slots__ = {
+        "name": """Name of the hyperparameter""",
+        "value": """Value of the hyperparameter. An instance of
+        :class:`.primitives.EmptyValue` should present if value is not set.""",
+        "priority": """Priority of this hyperparameter occurrence. The value of
+        the highest priority of all the occurrences of the same hyperparameter
+        will be denoted as "the value of this hyperparameter". See
+        :class:`HyperParameterPriority` for details about the meaning of each
+        priority.""",
+        "filename": """Filename in which this hyperparameter occurs. Will only
+        present in parsed hyperparameters""",
+        "lineno": """In which line of the file this hyperparameter occurs. Will
+        only present in parsed hyperparameters""",
+        "source_span": """Location of the value of this occurrence in the source
+        code as (lineno, col_offset, end_lineno, end_col_offset); column offsets
+        are in UTF-8 bytes, and the end position is None before python 3.8. Will
+        only present in parsed hyperparameters with a default value""",
+        "_ast_node": "",
+        "hints": """Hints provided by user of this occurrence of the
+        hyperparameter. Will only present in parsed hyperparameters; it is
+        :data:`EMPTY_HINTS` if there is none.""",
+        "source_helper": """Source infomation and helper functions for this
+        occurrence.""",
+    }
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        value: Any = EmptyValue(),
+        priority: HyperParameterPriority = P.PRIORITY_PARSED_FROM_SOURCE_CODE,
+        filename: Optional[str] = None,
+        lineno: Optional[int] = None,
+        source_span: Optional[Tuple[int, int, Optional[int], Optional[int]]] = None,
+        ast_node: Optional[ast.AST] = None,
+        hints: Optional[Mapping[str, Any]] = None,
+        source_helper: Optional[SourceHelper] = None,
+        **kwargs
+    ):
+        # names and filenames are repeated across many occurrences
+        if type(name) is str:
+            name = sys.intern(name)
+        self.name = name  # type: str  # type: ignore
+        self.value = value
+        self.priority = priority
+        self.filename = sys.intern(filename) if type(filename) is str else filename
+        self.lineno = lineno
+        self.source_span = source_span
+        self._ast_node = ast_node
+        self.hints = EMPTY_HINTS if hints is not None and not hints else hints
+        self.source_helper = source_helper
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        ast_node = state.pop("_ast_node", None)
+        self.__init__(ast_node=ast_node, **state)  # type: ignore
 
-    def __init__(self, **kwargs):
-        for k, v in kwargs.items():
-            if not k.startswith("_") and hasattr(HyperParameterOccurrence, k):
-                setattr(self, k, v)
+    @property
+    def ast_node(self) -> Optional[ast.AST]:
+        """The parsed `ast.AST` object of the value of this occurrence. Will
+        only present in parsed hyperparameters. If it is dropped (see
+        :meth:`.hpm.HyperParameterManager.compact`), it is parsed again from
+        the source code on demand, with the same type and location."""
+        if self._ast_node is None and self.source_span is not None:
+            return self._parse_ast_node(self.source_span)
+        return self._ast_node
+
+    @ast_node.setter
+    def ast_node(self, ast_node: Optional[ast.AST]) -> None:
+        self._ast_node = ast_node
+
+    def _parse_ast_node(
+        self, source_span: Tuple[int, int, Optional[int], Optional[int]]
+    ) -> Optional[ast.AST]:
+        lineno, col_offset, end_lineno, end_col_offset = source_span
+        if self.source_helper is None:
+            return None
+        if end_lineno is None:  # python < 3.8
+            return _find_ast_node(self.source_helper.source, lineno, col_offset)
+
+        lines = [
+            line.encode("utf-8")
+            for line in self.source_helper.lines[lineno - 1 : end_lineno]
+        ]
+        if len(lines) != end_lineno - lineno + 1:  # source is not available
+            return None
+
+        lines[-1] = lines[-1][:end_col_offset]
+        lines[0] = lines[0][col_offset:]
+        # parenthesize so that continuation lines can have any indentation
+        segment = "(" + b"\n".join(lines).decode("utf-8") + ")"
+        try:
+            node = ast.parse(segment, mode="eval").body
+        except SyntaxError:
+            return None
+
+        for child in ast.walk(node):
+            if getattr(child, "end_lineno", None) == 1:
+                child.end_col_offset += col_offset - 1  # type: ignore
+            if getattr(child, "lineno", None) == 1:
+                child.col_offset += col_offset - 1  # type: ignore
+        return ast.increment_lineno(node, lineno - 1)
 
     @property
     def has_default_value(self):
@@ -76,66 +176,169 @@ class HyperParameterOccurrence:
         return self.priority * 10 - isinstance(self.value, EmptyValue)
 
 
+def _find_ast_node(source: str, lineno: int, col_offset: int) -> Optional[ast.AST]:
+    """Find an expression node by its start in the whole source parsed again,
+    when its end is unknown."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    # breadth-first, so the outermost expression starting there is the first
+    # one, e.g. ``a.b`` rather than ``a``
+    for node in ast.walk(tree):
+        if isinstance(node, ast.expr) and (node.lineno, node.col_offset) == (
+            lineno,
+            col_offset,
+        ):
+            return node
+    return None
+
+
 class HyperParamNode:
+    """All occurrences of a hyperparameter.
+
+    Each runtime value priority (see
+    :attr:`HyperParameterOccurrence.value_priority`) has a single slot,
+    while statically parsed occurrences are kept in the order they are
+    pushed. The occurrence with the highest priority is kept up to date on
+    every push and removal, so reading the value is a constant time field
+    read, regardless of the number of parsed occurrences.
+    """
+
+    __slots__ = (
+        "name",
+        "_runtime",
+        "_parsed",
+        "_source_default",
+        "_top",
+    )
+
+    # value priority -> index of its slot in _runtime, from the highest
+    _RUNTIME_SLOTS = {
+        P.PRIORITY_SET_FROM_SETTER * 10: 0,
+        P.PRIORITY_SET_FROM_SETTER * 10 - 1: 1,
+        P.PRIORITY_SET_FROM_CALLABLE * 10: 2,
+        P.PRIORITY_SET_FROM_CALLABLE * 10 - 1: 3,
+    }
+
     def __init__(self, name: str = ""):
         self.name = name
-        self._db = []  # type: List[HyperParameterOccurrence]
+
+        # setter, empty setter, callable and empty callable occurrences
+        self._runtime = [None] * 4  # type: List[Optional[HyperParameterOccurrence]]
+
+        # All statically parsed occurrences in the order they are pushed. It
+        # is only used for listing and removal, not for resolving the value.
+        self._parsed = []  # type: List[HyperParameterOccurrence]
+
+        # The first statically parsed occurrence with a default value.
+        self._source_default = None  # type: Optional[HyperParameterOccurrence]
+
+        # The occurrence with the highest priority.
+        self._top = None  # type: Optional[HyperParameterOccurrence]
 
     def push(self, occ: HyperParameterOccurrence):
-        """Push occurrence to current node, sort by priority."""
-        if not len(self):
-            self._db.append(occ)
-            return
+        """Push occurrence to current node. A runtime occurrence replaces the
+        one of the same value priority."""
+        assert self._top is None or occ.name == self._top.name, (occ.name, self.name)
 
-        top = self.get()
-        assert occ.name == top.name  # type: ignore
+        if occ.priority == P.PRIORITY_PARSED_FROM_SOURCE_CODE:
+            self._parsed.append(occ)
+            if self._source_default is None and occ.has_default_value:
+                self._source_default = occ
+        else:
+            self._runtime[self._RUNTIME_SLOTS[occ.value_priority]] = occ
+
+        self._update_top()
 
-        # push from static parsing
+    def remove(self, occ: HyperParameterOccurrence) -> bool:
+        """Remove an occurrence (compared by identity) from current node.
+
+        :return: whether the occurrence is found and removed
+        """
         if occ.priority == P.PRIORITY_PARSED_FROM_SOURCE_CODE:
-            self._db.append(occ)
-            self._db.sort(key=lambda x: -x.value_priority)
-            return
-
-        pos, replacement = -1, False
-        for i, v in enumerate(self._db):
-            pos = i
-            # if current priority is lower than new, insert here
-            if v.value_priority < occ.value_priority:
-                break
-            # only one slot for each priority
-            elif v.value_priority == occ.value_priority:
-                replacement = True
-                break
+            for i, v in enumerate(self._parsed):
+                if v is occ:
+                    del self._parsed[i]
+                    break
+            else:
+                return False
+
+            if occ is self._source_default:
+                self._source_default = next(
+                    (item for item in self._parsed if item.has_default_value), None
+                )
         else:
-            pos = len(self._db)
+            idx = self._RUNTIME_SLOTS[occ.value_priority]
+            if self._runtime[idx] is not occ:
+                return False
+            self._runtime[idx] = None
+
+        self._update_top()
+        return True
 
-        if replacement:
-            self._db[pos] = occ
+    def replace(
+        self,
+        old: List[HyperParameterOccurrence],
+        new: List[HyperParameterOccurrence],
+    ) -> None:
+        """Replace statically parsed occurrences (compared by identity) by
+        others at once: the top occurrence is only updated at the end, so
+        that the value is read either before or after the replacement.
+
+        :raise DoubleAssignmentException: if two of the resulting occurrences
+            have a default value. The node is left untouched.
+        """
+        old_ids = {id(occ) for occ in old}
+        parsed = [occ for occ in self._parsed if id(occ) not in old_ids]
+        source_default = next((occ for occ in parsed if occ.has_default_value), None)
+        for occ in new:
+            assert occ.priority == P.PRIORITY_PARSED_FROM_SOURCE_CODE, occ
+            if occ.has_default_value:
+                if source_default is not None:
+                    raise self._double_assignment(source_default, occ)
+                source_default = occ
+            parsed.append(occ)
+
+        self._parsed = parsed
+        self._source_default = source_default
+        self._update_top()
+
+    def _update_top(self) -> None:
+        for occ in self._runtime:
+            if occ is not None:
+                self._top = occ
+                return
+
+        if self._source_default is not None:
+            self._top = self._source_default
+        elif self._parsed:
+            self._top = self._parsed[0]
         else:
-            self._db.insert(pos, occ)
+            self._top = None
 
     def get(self) -> Optional[HyperParameterOccurrence]:
         """Get the occurrence with highest priority."""
-        if len(self) == 0:
-            return None
-
-        return self._db[0]
+        return self._top
 
     @property
     def db(self) -> List[HyperParameterOccurrence]:
-        """Get all occurrences."""
-        if len(self) == 0:
-            return []
-
-        return self._db
+        """Get all occurrences, sorted by priority."""
+        return (
+            [occ for occ in self._runtime if occ is not None]
+            + [occ for occ in self._parsed if occ.has_default_value]
+            + [occ for occ in self._parsed if not occ.has_default_value]
+        )
 
     @property
     def value(self) -> Any:
         """Get the value of the top occurrence."""
-        if len(self) == 0:
+        top = self._top
+        if top is None:
             return EmptyValue()
 
-        return self._db[0].value
+        return top.value
 
     @property
     def empty(self):
@@ -149,27 +352,58 @@ class HyperParamNode:
         :param occurrence: the occurrence to be formated
         """
         assert occurrence is not None
-        return occurrence.source_helper.format_given_filename_and_lineno(
-            occurrence.filename, occurrence.lineno
-        )
+        filename, lineno = occurrence.filename, occurrence.lineno
+        if filename is None or lineno is None:
+            return "{}:{}".format(filename, lineno)
+        # e.g. unpickled at a level without sources, see HyperParamTree.dump
+        helper = occurrence.source_helper or SourceHelper.lazy(filename)
+        return helper.format_given_filename_and_lineno(filename, lineno)
 
     def _check_source_code_double_assigment(self, occ):
-        for item in self._db:
-            if not item.priority == P.PRIORITY_PARSED_FROM_SOURCE_CODE:
-                continue
-
-            if item.has_default_value:
-                error_msg = (
-                    "Duplicated default values:\n"
-                    "First occurrence:\n"
-                    "{}\n"
-                    "Second occurrence:\n"
-                    "{}\n"
-                ).format(self.format_occurrence(item), self.format_occurrence(occ))
-                raise DoubleAssignmentException(error_msg)
+        item = self._source_default
+        if item is not None:
+            raise self._double_assignment(item, occ)
+
+    @classmethod
+    def _double_assignment(
+        cls, first: HyperParameterOccurrence, second: HyperParameterOccurrence
+    ) -> DoubleAssignmentException:
+        error_msg = (
+            "Duplicated default values:\n"
+            "First occurrence:\n"
+            "{}\n"
+            "Second occurrence:\n"
+            "{}\n"
+        ).format(cls.format_occurrence(first), cls.format_occurrence(second))
+        return DoubleAssignmentException(error_msg)
 
     def __len__(self):
-        return len(self._db)
+        return len(self._parsed) + sum(occ is not None for occ in self._runtime)
+
+
+class TreeValues(dict):
+    """Nested dict of values cached by :meth:`HyperParamTree._tree_values`,
+    shared by all readers. It is never handed out to users as it is, but
+    copied by :func:`copy_tree_values`; the type tells cached dicts of
+    subtrees from dict values of leaves, which are not copied."""
+
+
+class AnnotatedDict(dict):
+    """Copy of a dict value of a leaf along with
+    :attr:`HyperParamTree.DICT_ANNOTATION`, cached by
+    :meth:`HyperParamTree._tree_values`. Being made by the tree, it is
+    copied by :func:`copy_tree_values` as well."""
+
+
+def copy_tree_values(value: Any) -> Any:
+    """Copy the nested dicts of cached :class:`TreeValues` into plain dicts,
+    and :class:`AnnotatedDict` values into shallow copies. Other values are
+    returned as they are."""
+    if type(value) is TreeValues:
+        return {k: copy_tree_values(v) for k, v in value.items()}
+    if type(value) is AnnotatedDict:
+        return dict(value)
+    return value
 
 
 class HyperParamTree:
@@ -182,6 +416,19 @@ class HyperParamTree:
     """Annotation string to indicate that a dict is not a tree.
     """
 
+    __slots__ = (
+        "sep",
+        "name",
+        "children",
+        "node",
+        "parent",
+        "generation",
+        "num_leaves",
+        "_is_counted",
+        "_values_cache",
+        "_index",
+    )
+
     def __init__(self, separator: str = ".", name: str = ""):
         """
         :param separator: character to separate nested keys.
@@ -194,24 +441,51 @@ class HyperParamTree:
         self.children = {}  # type: Dict[str, HyperParamTree]
         self.node = None  # type: Optional[HyperParamNode]
 
+        self.parent = None  # type: Optional[HyperParamTree]
+
+        self.generation = 0
+        """Write generation of the subtree. It is increased whenever an
+        occurrence is pushed to or retracted from the subtree, so that any
+        value derived from the subtree can be cached until it changes."""
+
+        self.num_leaves = 0
+        """Number of non-empty leaves (i.e. hyperparameters listed by
+        :meth:`flatten`) of the subtree. Maintained along with
+        :attr:`generation`."""
+
+        # whether the tree itself is a non-empty leaf, i.e. counted in
+        # num_leaves
+        self._is_counted = False
+
+        # annotate_dict -> (generation, dict returned by _tree_values), only
+        # allocated for branches
+        self._values_cache = (
+            None
+        )  # type: Optional[Dict[bool, Tuple[int, TreeValues]]]
+
+        # Flat index of full key -> subtree of all descendants. It is only
+        # maintained by the tree that allocates the subtrees, i.e. the root;
+        # it is None for subtrees.
+        self._index = {}  # type: Optional[Dict[str, HyperParamTree]]
+
     def flatten(self) -> Iterator[HyperParamNode]:
         """Flatten the tree of hyperparamters to a sequence of HyperParameterOccurrences"""
 
         def _wrapper(cur: HyperParamTree):
-            if cur.is_leaf() and (cur.node is not None) and (not cur.node.empty):
-                yield cur.node
+            # snapshots, as other threads may be writing the tree
+            children = tuple(cur.children.values())
+            node = cur.node
+            if not children and (node is not None) and (not node.empty):
+                yield node
 
-            for v in cur.children.values():
+            for v in children:
                 yield from _wrapper(v)
 
         yield from _wrapper(self)
 
     def count(self):
         """Get the number of all non-empty hyperparamters."""
-        acc = 0
-        for node in self.flatten():
-            acc += 1
-        return acc
+        return self.num_leaves
 
     @property
     def empty(self):
@@ -250,13 +524,14 @@ class HyperParamTree:
             return True
 
         # non-leaf without current node is valid
-        if not self.node or self.node.empty:
+        node = self.node
+        if not node or node.empty:
             return True
 
         # if node is set in static parser, valid
         if not strict:
-            occ = self.node.get()
-            if occ.priority < P.PRIORITY_SET_FROM_SETTER:
+            occ = node.get()
+            if occ is None or occ.priority < P.PRIORITY_SET_FROM_SETTER:
                 return True
 
         # both children and node are set, impossible tree
@@ -269,26 +544,45 @@ class HyperParamTree:
             add a dict annotation so it can be safely convert back to the same
             tree structure. This is often used for safe serialization
             (e.g. dump as yaml).
+
+        :note: The values are cached until the subtree is written (see
+            :attr:`generation`), and the cached dicts of subtrees are reused
+            by their ancestors. Callers get a copy of the nested dicts, so
+            they can modify it; values of leaves are not copied, except the
+            annotated copies of dict values.
         """
 
         assert self.is_branch()
-
-        def _walk(tree: HyperParamTree, level: Dict[str, Any]):
-            for k, v in tree.children.items():
-                assert v.is_valid(strict=False)
-                if v.is_leaf():
-                    assert v.node is not None
-                    val = v.node.value
-                    if isinstance(val, dict) and annotate_dict:
-                        val = val.copy()  # make a shallow copy
-                        val[self.DICT_ANNOTATION] = True
-                    level[k] = val
-                else:
-                    level[k] = {}
-                    _walk(v, level[k])
-
-        ret = {}  # type: Dict[str, Any]
-        _walk(self, ret)
+        return copy_tree_values(self._tree_values(annotate_dict))
+
+    def _tree_values(self, annotate_dict: bool) -> TreeValues:
+        # The result is internal; see copy_tree_values.
+        # Lock-free: the tree may be written by another thread meanwhile.
+        # Children are iterated over a snapshot, and the result is cached
+        # with the generation read beforehand, so that a result mixed with a
+        # concurrent write is never taken as up to date.
+        generation = self.generation
+        cache = self._values_cache
+        if cache is None:
+            cache = self._values_cache = {}
+        cached = cache.get(annotate_dict)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        ret = TreeValues()
+        for k, v in tuple(self.children.items()):
+            assert v.is_valid(strict=False)
+            node = v.node
+            if v.is_leaf():
+                val = node.value if node is not None else EmptyValue()
+                if isinstance(val, dict) and annotate_dict:
+                    val = AnnotatedDict(val)  # make a shallow copy
+                    val[self.DICT_ANNOTATION] = True
+                ret[k] = val
+            else:
+                ret[k] = v._tree_values(annotate_dict)
+
+        cache[annotate_dict] = (generation, ret)
         return ret
 
     def validate(self):
@@ -304,6 +598,45 @@ class HyperParamTree:
 
         return True
 
+    def validate_path(self, key: str) -> bool:
+        """Validate the trees on the route from current tree to *key*.
+
+        Pushing an occurrence can only invalidate the trees on its route, so
+        this is an efficient replacement of :meth:`validate` after pushing
+        occurrences into a valid tree.
+        """
+        tree = self  # type: Optional[HyperParamTree]
+        route = key.split(self.sep)
+        while tree is not None:
+            if not tree.is_valid(strict=True):
+                raise ImpossibleTree(
+                    "`{}` is both a leaf and a tree.".format(tree.node.name)  # type: ignore
+                )
+            if not route:
+                break
+            tree = tree.children.get(route.pop(0))
+
+        return True
+
+    def push_occurrences(
+        self,
+        occurrences: Iterable[HyperParameterOccurrence],
+        *,
+        source_helper: Optional[SourceHelper] = None
+    ) -> None:
+        """Add hyperparameter occurrences in bulk, e.g. all occurrences parsed
+        from a file. Akin to calling :meth:`push_occurrence` for each of
+        them, but the tree is validated only once at the end, along the
+        routes of the distinct names.
+        """
+        names = {}  # type: Dict[str, None]  # an ordered set
+        for occurrence in occurrences:
+            self._push(occurrence, source_helper)
+            names[occurrence.name] = None
+
+        for name in names:
+            self.validate_path(name)
+
     def push_occurrence(
         self,
         occurrence: HyperParameterOccurrence,
@@ -313,7 +646,17 @@ class HyperParamTree:
         """Add an hyperparameter occurrence. This method can only be used
         in static parsing phase.
         """
+        tree = self._push(occurrence, source_helper)
+        if not tree.is_valid(strict=True):
+            raise ImpossibleTree(
+                "node `{}` has is both a leaf and a tree.".format(occurrence.name)
+            )
 
+    def _push(
+        self,
+        occurrence: HyperParameterOccurrence,
+        source_helper: Optional[SourceHelper],
+    ) -> "HyperParamTree":
         assert isinstance(occurrence, HyperParameterOccurrence), (
             type(occurrence),
             occurrence,
@@ -330,35 +673,287 @@ class HyperParamTree:
                 tree.node._check_source_code_double_assigment(occurrence)
 
         tree.node.push(occurrence)
-        if not tree.is_valid(strict=True):
-            raise ImpossibleTree(
-                "node `{}` has is both a leaf and a tree.".format(occurrence.name)
+        tree._touch()
+        return tree
+
+    def _touch(self) -> None:
+        """Increase the generation of current tree and its ancestors, and
+        update their leaf counters after current tree is changed.
+        """
+        # Whether a tree is a non-empty leaf only changes for the written
+        # tree and, when children are added or removed, for its ancestors.
+        delta = 0
+        tree = self  # type: Optional[HyperParamTree]
+        while tree is not None:
+            is_counted = (
+                not tree.children and tree.node is not None and not tree.node.empty
             )
+            delta += is_counted - tree._is_counted
+            tree._is_counted = is_counted
+            tree.num_leaves += delta
+            tree.generation += 1
+            tree = tree.parent
 
-    def _allocate(self, key: str) -> "HyperParamTree":
-        def _wrapper(tree: HyperParamTree, route: Sequence[str]):
-            if not route:
-                return tree
+    def retract_occurrence(self, occurrence: HyperParameterOccurrence) -> bool:
+        """Remove a previously pushed occurrence. Subtrees left without any
+        occurrence are removed as well.
 
-            k, *rest = route
-            if k not in tree.children:
-                tree.children[k] = HyperParamTree(separator=tree.sep, name=k)
+        :return: whether the occurrence is found and removed
+        """
+        keys = occurrence.name.split(self.sep)
+        route = [self]
+        for k in keys:
+            if k not in route[-1].children:
+                return False
+            route.append(route[-1].children[k])
+
+        tree = route[-1]
+        if tree.node is None or not tree.node.remove(occurrence):
+            return False
+
+        if not len(tree.node):
+            tree.node = None
+        tree._touch()
+        self._prune(keys, route)
+        return True
+
+    def replace_occurrences(
+        self,
+        old: Iterable[HyperParameterOccurrence],
+        new: Iterable[HyperParameterOccurrence],
+        *,
+        source_helper: Optional[SourceHelper] = None
+    ) -> None:
+        """Replace previously pushed statically parsed occurrences by new
+        ones, e.g. those of a file parsed again after it is edited.
+
+        Unlike retracting the old occurrences before pushing the new ones,
+        a hyperparameter found in both never goes missing for lock-free
+        readers: each node switches to its new occurrences at once (see
+        :meth:`HyperParamNode.replace`), generations are increased once all
+        nodes are switched, and only then are the occurrences of names that
+        are gone retracted, and subtrees left without any occurrence pruned.
+
+        If the new occurrences conflict with others, the old ones are
+        restored and the exception is re-raised.
+        """
+        by_name = (
+            {}
+        )  # type: Dict[str, Tuple[List[HyperParameterOccurrence], List[HyperParameterOccurrence]]]
+        for occ in old:
+            by_name.setdefault(occ.name, ([], []))[0].append(occ)
+        for occ in new:
+            by_name.setdefault(occ.name, ([], []))[1].append(occ)
+            if occ.has_default_value and source_helper is not None:
+                occ.source_helper = source_helper
+
+        allocated = []  # type: List[str]
+        replaced = []  # type: List[HyperParamNode]
+        retracted = []  # type: List[HyperParameterOccurrence]
+        try:
+            self._replace_nodes(by_name, allocated, replaced)
+            for name in allocated:
+                self._allocate(name)._touch()
+            for old_occs, new_occs in by_name.values():
+                if not new_occs:
+                    retracted.extend(filter(self.retract_occurrence, old_occs))
+            for name in allocated:
+                self.validate_path(name)
+        except Exception:
+            for occ in retracted:
+                self._push(occ, None)
+            for node in replaced:
+                old_occs, new_occs = by_name[node.name]
+                node.replace(new_occs, old_occs)
+            for name in allocated:
+                self._discard_if_empty(name)
+            raise
+
+    def _replace_nodes(
+        self,
+        by_name: Dict[
+            str, Tuple[List[HyperParameterOccurrence], List[HyperParameterOccurrence]]
+        ],
+        allocated: List[str],
+        replaced: List["HyperParamNode"],
+    ) -> None:
+        """Switch the nodes of names with new occurrences, see
+        :meth:`replace_occurrences`. Allocated names and replaced nodes are
+        recorded as they go, so that a failure can be undone."""
+        for name, (old_occs, new_occs) in by_name.items():
+            if new_occs:
+                tree = self._allocate(name)
+                allocated.append(name)
+                if tree.node is None:
+                    tree.node = HyperParamNode(name)
+                tree.node.replace(old_occs, new_occs)
+                replaced.append(tree.node)
+
+    def _discard_if_empty(self, key: str) -> None:
+        """Update the subtree of an existing key after its node is changed in
+        place, removing it if it is left without any occurrence."""
+        keys = key.split(self.sep)
+        route = [self]
+        for k in keys:
+            route.append(route[-1].children[k])
+
+        tree = route[-1]
+        if tree.node is not None and not len(tree.node):
+            tree.node = None
+        tree._touch()
+        self._prune(keys, route)
+
+    def _prune(self, keys: List[str], route: List["HyperParamTree"]) -> None:
+        """Remove empty subtrees at the end of a route bottom-up.
+
+        :param keys: keys of the route from current tree
+        :param route: current tree and its descendants along the keys
+        """
+        index, prefix = self._root_index()
+        pruned = False
+        while len(route) > 1 and route[-1].empty:
+            child = route.pop()
+            del route[-1].children[child.name]
+            child.parent = None
+            if index is not None:
+                del index[self.sep.join(prefix + keys[: len(route)])]
+            pruned = True
+
+        if pruned:
+            # the parent of the pruned subtrees may be a leaf again
+            route[-1]._touch()
 
-            return _wrapper(tree.children[k], rest)
+    def _allocate(self, key: str) -> "HyperParamTree":
+        if self._index is not None:
+            tree = self._index.get(key)
+            if tree is not None:
+                return tree
 
-        return _wrapper(self, key.split(self.sep))
+        index, prefix = self._root_index()
+        tree = self
+        keys = key.split(self.sep)
+        for i, k in enumerate(keys):
+            child = tree.children.get(k)
+            if child is None:
+                child = HyperParamTree(separator=tree.sep, name=k)
+                child.parent = tree
+                child._index = None
+                tree.children[k] = child
+                if index is not None:
+                    index[self.sep.join(prefix + keys[: i + 1])] = child
+            tree = child
+
+        return tree
+
+    def _root_index(self) -> Tuple[Optional[Dict[str, "HyperParamTree"]], List[str]]:
+        """The flat index kept by the root of current tree, and the keys of
+        current tree from the root, so that subtrees allocated or pruned
+        through a subtree are indexed as well."""
+        keys = []  # type: List[str]
+        tree = self
+        while tree.parent is not None:
+            keys.append(tree.name)
+            tree = tree.parent
+        keys.reverse()
+        return tree._index, keys
 
     def get(self, key: str) -> Optional["HyperParamTree"]:
         if not key:
             return self
 
+        # A single dict lookup for the root. A key ending with the separator
+        # addresses the subtree of its prefix (see below), which is not
+        # indexed.
+        if self._index is not None and key[-1] != self.sep:
+            return self._index.get(key)
+
         cur, *rest = key.split(self.sep, maxsplit=1)
-        if cur not in self.children:
+        child = self.children.get(cur)
+        if child is None:
             return None
 
         rest_key = rest[0] if rest else ""
 
-        return self.children[cur].get(rest_key)
+        return child.get(rest_key)
+
+    def view(self) -> "HyperParamTreeView":
+        """Get a read-only mapping view of the tree, see
+        :class:`HyperParamTreeView`.
+        """
+        return HyperParamTreeView(self)
+
+    def dump(self, level: str = "full") -> List[Any]:
+        """Dump the occurrences of the tree into a list of rows, from which
+        :meth:`load` rebuilds an equivalent tree.
+
+        :param level: level of detail, one of :data:`PICKLE_LEVELS`. Rows
+            are occurrences at level ``"full"``, and tuples of the arguments
+            of :class:`HyperParameterOccurrence` otherwise.
+        """
+        if level not in PICKLE_LEVELS:
+            raise ValueError(
+                "Unknown pickle level `{}`; expected one of {}.".format(
+                    level, PICKLE_LEVELS
+                )
+            )
+
+        rows = []  # type: List[Any]
+
+        def _dump(tree: HyperParamTree):
+            node = tree.node
+            if node is not None:
+                if level == "values":
+                    top = node.get()
+                    if top is not None:
+                        rows.append((top.name, top.value, int(top.priority)))
+                else:
+                    # parsed occurrences are pushed back in the same order;
+                    # runtime occurrences take their own slots anyway
+                    occs = node._parsed + [occ for occ in node._runtime if occ]
+                    if level == "full":
+                        rows.extend(occs)
+                    else:
+                        rows.extend(
+                            (
+                                occ.name,
+                                occ.value,
+                                int(occ.priority),
+                                occ.filename,
+                                occ.lineno,
+                                occ.source_span,
+                                None,  # ast node
+                                occ.hints,
+                            )
+                            for occ in occs
+                        )
+            for child in tuple(tree.children.values()):
+                _dump(child)
+
+        _dump(self)
+        return rows
+
+    @classmethod
+    def load(cls, rows: Iterable[Any], separator: str = ".") -> "HyperParamTree":
+        """Rebuild a tree from the rows of :meth:`dump`.
+
+        :param rows: rows dumped from a tree
+        :param separator: character to separate nested keys
+        """
+        tree = cls(separator)
+        for row in rows:
+            if not isinstance(row, HyperParameterOccurrence):
+                name, value, priority, *location = row
+                row = HyperParameterOccurrence(name, value, P(priority), *location)
+            # the dumped tree is valid, though maybe only in non-strict mode
+            tree._push(row, None)
+        return tree
+
+    def __reduce__(self):
+        if self._index is None:
+            raise TypeError(
+                "Only the root of a tree of hyperparameters can be pickled."
+            )
+        return (_load_tree, (self.dump("full"), self.sep))
 
     def __setitem__(self, key: str, value: Primitive):
         self.push_occurrence(
@@ -366,3 +961,48 @@ class HyperParamTree:
                 name=key, value=value, priority=P.PRIORITY_SET_FROM_SETTER
             )
         )
+
+
+def _load_tree(rows: List[Any], separator: str) -> HyperParamTree:
+    return HyperParamTree.load(rows, separator)
+
+
+class HyperParamTreeView(collections.abc.Mapping):
+    """A read-only mapping view of a :class:`HyperParamTree`.
+
+    It has the same keys and values as :meth:`HyperParamTree.tree_values`,
+    except that subtrees are views as well. Nothing is copied: items are
+    read from the live tree on access, child views are created on demand,
+    and dict values of leaves are returned as they are.
+
+    :note: A view is bound to a subtree. If all occurrences under the
+        subtree are retracted (see :meth:`HyperParamTree.retract_occurrence`),
+        the subtree is removed from the tree and the view stays empty.
+    """
+
+    def __init__(self, tree: HyperParamTree) -> None:
+        """
+        :param tree: the tree to be viewed
+        """
+        self._tree = tree
+
+    def __getitem__(self, key: str) -> Any:
+        child = self._tree.children[key]
+        if child.children:
+            return HyperParamTreeView(child)
+
+        node = child.node
+        return node.value if node is not None else EmptyValue()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._tree.children
+
+    def __iter__(self) -> Iterator[str]:
+        # a snapshot, as other threads may be writing the tree
+        return iter(tuple(self._tree.children))
+
+    def __len__(self) -> int:
+        return len(self._tree.children)
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(type(self).__name__, dict(self.items()))
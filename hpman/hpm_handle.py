@@ -0,0 +1,73 @@
+from typing import TYPE_CHECKING, Any
+
+from .hpm_db import copy_tree_values
+from .hpm_override import get_overrides
+from .primitives import EmptyValue
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .hpm import HyperParameterManager
+
+
+class HyperParameterHandle:
+    """A handle bound to a hyperparameter name, see
+    :meth:`.hpm.HyperParameterManager.handle`.
+
+    The resolved value is cached along with the generation of the tree it
+    is read from; a read only resolves the name again after the
+    hyperparameter is written (e.g. by
+    :meth:`.hpm.HyperParameterManager.set_value`), so reads in hot loops are
+    a single attribute comparison and always see the live value.
+    """
+
+    def __init__(self, hpm: "HyperParameterManager", name: str) -> None:
+        """
+        :param hpm: the manager to read values from
+        :param name: name of the hyperparameter
+        """
+        self.hpm = hpm
+        self.name = name
+
+        # (tree, generation of the tree, value), set on the first successful
+        # read
+        self._cache = None  # type: Any
+
+    @property
+    def value(self) -> Any:
+        """The current authoritative value of the hyperparameter, including
+        overrides of the current context (see
+        :meth:`.hpm.HyperParameterManager.override`). Raises
+        :class:`KeyError` if it does not exist.
+        """
+        if self.hpm._shared is not None:
+            self.hpm._sync_shared()
+        cache = self._cache
+        if cache is not None and cache[0].generation == cache[1]:
+            if self.hpm._overridden and get_overrides(self.hpm):
+                return self.hpm.get_value(self.name)
+            return copy_tree_values(cache[2])
+        return self._resolve()
+
+    def __call__(self) -> Any:
+        return self.value
+
+    def __reduce__(self):
+        return (HyperParameterHandle, (self.hpm, self.name))
+
+    def _resolve(self) -> Any:
+        if self.hpm._overridden and get_overrides(self.hpm):
+            return self.hpm.get_value(self.name)
+
+        tree = self.hpm.tree.get(self.name)
+        # read before the value, so that a value mixed with a concurrent
+        # write is never taken as up to date
+        generation = tree.generation if tree is not None else None
+        value = self.hpm._get_tree_value(tree)
+        if isinstance(value, EmptyValue):
+            self._cache = None
+            raise KeyError("`{}` not found".format(self.name))
+
+        self._cache = (tree, generation, value)
+        return copy_tree_values(value)
+
+    def __repr__(self) -> str:
+        return "{}({!r})".format(type(self).__name__, self.name)
@@ -0,0 +1,150 @@
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from typing import TYPE_CHECKING, List, Optional, Union
+
+from .hpm_parser import parse_file_occurrences
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .hpm import HyperParameterManager
+
+
+class HyperParameterImportHook(importlib.abc.MetaPathFinder):
+    """A finder of :data:`sys.meta_path` that parses the source of python
+    modules as they are imported, so that the tree of hyperparameters holds
+    exactly those of imported code, without walking directories.
+
+    Modules are found by the finders after the hook in :data:`sys.meta_path`
+    as usual, and the hook is placed right before
+    :class:`importlib.machinery.PathFinder`; several hooks (e.g. of managers
+    with different placeholders) can be installed at once. The source read
+    by the import system to compile a module is parsed as it is, without
+    reading it again.
+    A module loaded from its bytecode cache (``.pyc``) is parsed from its
+    source file instead, or loaded from the parse cache if ``cache_dir`` is
+    given. Reloaded modules replace their previous occurrences, see
+    :meth:`.hpm.HyperParameterManager.reparse_file`.
+
+    Errors of parsing (e.g. :class:`.primitives.DoubleAssignmentException`)
+    are raised by the import statement, and so is
+    :class:`.primitives.FrozenManagerException` for a module with
+    hyperparameters imported while the manager is frozen.
+    """
+
+    def __init__(
+        self,
+        hpm: "HyperParameterManager",
+        paths: Union[str, List[str]],
+        *,
+        cache_dir: Optional[str] = None,
+        keep_ast_nodes: bool = True
+    ) -> None:
+        """
+        :param hpm: the manager to push parsed occurrences to
+        :param paths: only modules in these directories (or these files) are
+            parsed, e.g. the directory of the project. They have to be given
+            explicitly, so that third party code, whose calls of a function
+            named like the placeholder (e.g. ``_`` of :mod:`gettext`) are not
+            hyperparameters, is never parsed.
+        :param cache_dir: see :meth:`.hpm.HyperParameterManager.parse_file`
+        :param keep_ast_nodes: see :meth:`.hpm.HyperParameterManager.parse_file`
+        """
+        self.hpm = hpm
+        paths = paths if isinstance(paths, list) else [paths]
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.cache_dir = cache_dir
+        self.keep_ast_nodes = keep_ast_nodes
+
+    def install(self) -> None:
+        """Insert the hook into :data:`sys.meta_path`, right before
+        :class:`importlib.machinery.PathFinder`."""
+        if self in sys.meta_path:
+            return
+        try:
+            index = sys.meta_path.index(importlib.machinery.PathFinder)
+        except ValueError:  # pragma: no cover
+            index = len(sys.meta_path)
+        sys.meta_path.insert(index, self)
+
+    def uninstall(self) -> None:
+        """Remove the hook from :data:`sys.meta_path`. Modules imported so far
+        are kept in the tree."""
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        try:
+            finders = sys.meta_path[sys.meta_path.index(self) + 1 :]
+        except ValueError:  # uninstalled meanwhile
+            return None
+
+        for finder in finders:
+            find_spec = getattr(finder, "find_spec", None)
+            spec = find_spec(fullname, path, target) if find_spec else None
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.origin is None or not self.is_watched(spec.origin):
+            return spec
+
+        if isinstance(spec.loader, _HyperParameterLoader):
+            spec.loader.hooks.insert(0, self)
+        # exactly, since subclasses may get their source elsewhere
+        elif type(spec.loader) is importlib.machinery.SourceFileLoader:
+            spec.loader = _HyperParameterLoader(fullname, spec.origin, self)
+        return spec
+
+    def is_watched(self, filename: str) -> bool:
+        """Whether a module file is to be parsed."""
+        filename = os.path.abspath(filename)
+        return any(_is_under(filename, p) for p in self.paths)
+
+    def parse(self, filename: str, source: Optional[str] = None) -> None:
+        """Parse an imported module and push its occurrences.
+
+        :param filename: path of the module
+        :param source: source code of the module, if it has been read already
+        """
+        self.hpm._push_imported_file(
+            filename,
+            *parse_file_occurrences(
+                filename,
+                self.hpm.placeholder,
+                self.cache_dir,
+                self.keep_ast_nodes,
+                source,
+            )
+        )
+
+
+class _HyperParameterLoader(importlib.machinery.SourceFileLoader):
+    """Source file loader that hands the source of the module to
+    :class:`HyperParameterImportHook` objects before compiling it."""
+
+    def __init__(self, fullname: str, path: str, hook: HyperParameterImportHook):
+        super().__init__(fullname, path)
+        self.hooks = [hook]
+        self._source_parsed = False
+
+    def source_to_code(self, data, path, *, _optimize=-1):
+        source = importlib.util.decode_source(data)
+        for hook in self.hooks:
+            hook.parse(path, source)
+        self._source_parsed = True
+        return super().source_to_code(data, path, _optimize=_optimize)
+
+    def get_code(self, fullname):
+        self._source_parsed = False
+        code = super().get_code(fullname)
+        if not self._source_parsed:  # loaded from the bytecode cache
+            for hook in self.hooks:
+                hook.parse(self.path)
+        return code
+
+
+def _is_under(filename: str, path: str) -> bool:
+    return filename == path or filename.startswith(path.rstrip(os.sep) + os.sep)
@@ -0,0 +1,163 @@
+import contextlib
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .__version__ import __version__
+from .hpm_cache import Row, occurrences_to_rows, rows_to_occurrences
+from .hpm_db import HyperParameterOccurrence
+from .source_helper import Fingerprint, file_fingerprint
+
+
+def file_digest(path: str) -> str:
+    """SHA-1 digest of the content of a file."""
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextlib.contextmanager
+def gc_paused() -> Iterator[None]:
+    """Disable the garbage collector meanwhile, e.g. while loading many small
+    objects at once, which would trigger many useless collections."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class HyperParameterManifest:
+    """Occurrences parsed from source files, stored in a single file so that
+    jobs can rebuild the tree of hyperparameters without reading or parsing
+    the sources, see :meth:`.hpm.HyperParameterManager.export_manifest`.
+
+    Each file is stored with its fingerprint (mtime and size), the digest of
+    its content and its occurrences, in the row format of
+    :class:`.hpm_cache.ParseCache`. A file is stale if it has been deleted,
+    or if its fingerprint and its digest have both changed; the digest is
+    only computed for files whose fingerprint has changed (e.g. after a
+    fresh checkout), so that checking an up-to-date manifest costs a
+    ``stat`` per file.
+
+    :note: Manifests are pickled; only load them from a trusted location.
+    """
+
+    FORMAT_VERSION = 1
+    """Version of the manifest format. Bump it whenever the layout changes."""
+
+    def __init__(
+        self,
+        placeholder: str,
+        files: Dict[str, Tuple[Fingerprint, Optional[str], List[Row]]],
+    ) -> None:
+        """
+        :param placeholder: placeholder name the files are parsed with
+        :param files: path -> (fingerprint when parsed, digest of the content
+            or None if unknown, occurrence rows)
+        """
+        self.placeholder = placeholder
+        self.files = files
+
+    @classmethod
+    def build(
+        cls,
+        placeholder: str,
+        fingerprints: Dict[str, Fingerprint],
+        occurrences: Dict[str, List[HyperParameterOccurrence]],
+    ) -> "HyperParameterManifest":
+        """Build a manifest of parsed files.
+
+        :param placeholder: placeholder name the files are parsed with
+        :param fingerprints: path -> fingerprint of parsed files when they
+            were read
+        :param occurrences: path -> occurrences parsed from the file
+        """
+        files = {}
+        for path, fingerprint in fingerprints.items():
+            try:
+                # a file modified since it was parsed has no known digest,
+                # and is always stale
+                unchanged = file_fingerprint(path) == tuple(fingerprint)
+                digest = file_digest(path) if unchanged else None
+            except OSError:
+                digest = None
+            files[path] = (
+                fingerprint,
+                digest,
+                occurrences_to_rows(occurrences.get(path, [])),
+            )
+        return cls(placeholder, files)
+
+    def write(self, path: str) -> None:
+        """Atomically write the manifest to a file.
+
+        :param path: path of the manifest file
+        """
+        dirname = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=dirname, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    (self.FORMAT_VERSION, __version__, self.placeholder, self.files),
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def read(cls, path: str) -> "HyperParameterManifest":
+        """Read a manifest written by :meth:`write`.
+
+        :param path: path of the manifest file
+        :raise ValueError: if the manifest is written in another format, or
+            by another version of hpman
+        """
+        with open(path, "rb") as f:
+            format_version, version, placeholder, files = pickle.load(f)
+        if (format_version, version) != (cls.FORMAT_VERSION, __version__):
+            raise ValueError(
+                "Manifest `{}` is written by hpman {} (format {}), which is "
+                "incompatible with hpman {} (format {}).".format(
+                    path, version, format_version, __version__, cls.FORMAT_VERSION
+                )
+            )
+        return cls(placeholder, files)
+
+    def is_stale(self, path: str) -> bool:
+        """Whether a file has changed since it was parsed.
+
+        :param path: path of a file in the manifest
+        """
+        fingerprint, digest, _rows = self.files[path]
+        try:
+            if file_fingerprint(path) == tuple(fingerprint):
+                return False
+            return digest is None or file_digest(path) != digest
+        except OSError:
+            return True
+
+    def stale_files(self) -> List[str]:
+        """Files that have changed since they were parsed. Files added to the
+        parsed directories afterwards are not detected."""
+        return [path for path in self.files if self.is_stale(path)]
+
+    def occurrences(self, path: str) -> List[HyperParameterOccurrence]:
+        """Occurrences parsed from a file.
+
+        :param path: path of a file in the manifest
+        """
+        return rows_to_occurrences(path, self.files[path][2])
@@ -0,0 +1,191 @@
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from .hpm_db import HyperParamTree
+from .primitives import ImpossibleTree
+
+try:
+    import contextvars
+except ImportError:  # pragma: no cover  # python < 3.7
+    contextvars = None  # type: ignore
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .hpm import HyperParameterManager
+
+
+class _ThreadLocalVar(threading.local):
+    """A minimal stand-in of :class:`contextvars.ContextVar` for python
+    versions without it, where overrides are scoped per thread rather than
+    per task."""
+
+    def __init__(self, name: str, *, default: Any) -> None:
+        self.value = default
+
+    def get(self) -> Any:
+        return self.value
+
+    def set(self, value: Any) -> Any:
+        token, self.value = self.value, value
+        return token
+
+    def reset(self, token: Any) -> None:
+        self.value = token
+
+
+# manager -> flat dict of name -> value overridden in the current context.
+# A single variable for all managers, as context variables are never
+# garbage-collected.
+_overrides_var = (
+    contextvars.ContextVar("hpman_overrides", default={})
+    if contextvars is not None
+    else _ThreadLocalVar("hpman_overrides", default={})
+)  # type: Union[contextvars.ContextVar[Dict[HyperParameterManager, Dict[str, Any]]], _ThreadLocalVar]
+
+
+def get_overrides(hpm: "HyperParameterManager") -> Optional[Dict[str, Any]]:
+    """Get the values overridden in the current context, see
+    :meth:`.hpm.HyperParameterManager.override`.
+
+    :return: a flat dict of name to value, or None if there is no override
+    """
+    return _overrides_var.get().get(hpm)
+
+
+class HyperParameterOverride:
+    """A context manager that overrides values of hyperparameters in the
+    current context, see :meth:`.hpm.HyperParameterManager.override`.
+
+    Overrides are kept in a :mod:`contextvars` variable, so they are scoped
+    to the current thread or asyncio task (and tasks it creates), while the
+    tree of hyperparameters is shared. Nested overrides are layered on top
+    of outer ones.
+    """
+
+    def __init__(self, hpm: "HyperParameterManager", values: Mapping[str, Any]):
+        """
+        :param hpm: the manager of the hyperparameters
+        :param values: flat dict of name to value. Names can not be trees of
+            hyperparameters nor nested in values that are not trees, akin to
+            :meth:`.hpm.HyperParameterManager.set_values`.
+        """
+        self.hpm = hpm
+        self.values = dict(values)
+        self._tokens = []  # type: List[Any]
+
+        _check_override_names(hpm, self.values)
+
+    def __enter__(self) -> "HyperParameterManager":
+        current = _overrides_var.get()
+        merged = _merge_overrides(
+            current.get(self.hpm, {}), self.values, self.hpm.separator
+        )
+        layered = dict(current)
+        layered[self.hpm] = merged
+        self._tokens.append(_overrides_var.set(layered))
+        self.hpm._overridden = True
+        return self.hpm
+
+    def __exit__(self, *exc_info) -> None:
+        _overrides_var.reset(self._tokens.pop())
+
+    async def __aenter__(self) -> "HyperParameterManager":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.__exit__(*exc_info)
+
+
+def _check_override_names(hpm: "HyperParameterManager", values: Dict[str, Any]):
+    """Check that overrides keep the shape of the tree of hyperparameters."""
+    sep = hpm.separator
+    for name in values:
+        if not isinstance(name, str) or not name:
+            raise ImpossibleTree("Invalid hyperparameter name {!r}.".format(name))
+
+        tree = hpm.tree.get(name)
+        if tree is not None and tree.children:
+            raise ImpossibleTree(
+                "`{}` is a tree of hyperparameters, and can not be "
+                "overridden as a whole.".format(name)
+            )
+
+        parts = name.split(sep)
+        for i in range(1, len(parts)):
+            prefix = sep.join(parts[:i])
+            tree = hpm.tree.get(prefix)
+            node = tree.node if tree is not None and not tree.children else None
+            if (node is not None and not node.empty) or prefix in values:
+                raise ImpossibleTree("`{}` is both a leaf and a tree.".format(prefix))
+
+
+def _merge_overrides(
+    outer: Dict[str, Any], inner: Dict[str, Any], sep: str
+) -> Dict[str, Any]:
+    """Layer inner overrides on top of outer ones. Outer overrides nested in
+    or containing an inner one are shadowed."""
+    merged = {
+        k: v
+        for k, v in outer.items()
+        if not any(
+            k == name or k.startswith(name + sep) or name.startswith(k + sep)
+            for name in inner
+        )
+    }
+    merged.update(inner)
+    return merged
+
+
+def overrides_under(
+    overrides: Dict[str, Any], prefix: str, sep: str
+) -> List[Tuple[str, Any]]:
+    """Get overridden values nested in a prefix, with names relative to it.
+
+    :param prefix: the prefix; the root if it is empty
+    """
+    if not prefix:
+        return list(overrides.items())
+
+    prefix += sep
+    return [
+        (k[len(prefix) :], v) for k, v in overrides.items() if k.startswith(prefix)
+    ]
+
+
+def apply_overrides(
+    tree_values: Mapping[str, Any],
+    items: Iterable[Tuple[str, Any]],
+    sep: str,
+    annotate_dict: bool = False,
+) -> Dict[str, Any]:
+    """Get a copy of a nested dict of values with overridden values. Only
+    dicts on the routes to the overridden values are copied.
+
+    :param tree_values: nested dict of values, see
+        :meth:`.hpm_db.HyperParamTree.tree_values`
+    :param items: names relative to the root of tree_values, and their values
+    :param annotate_dict: see :meth:`.hpm_db.HyperParamTree.tree_values`
+    """
+    ret = dict(tree_values)
+    for name, value in items:
+        level = ret
+        *route, key = name.split(sep)
+        for k in route:
+            child = level.get(k)
+            child = dict(child) if isinstance(child, dict) else {}
+            level[k] = child
+            level = child
+        if isinstance(value, dict) and annotate_dict:
+            value = dict(value)
+            value[HyperParamTree.DICT_ANNOTATION] = True
+        level[key] = value
+    return ret
@@ -0,0 +1,319 @@
+import ast
+import bisect
+import collections
+import functools
+import glob
+import os
+import re
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Set, Tuple, Union
+
+from .hpm_cache import ParseCache
+from .hpm_db import HyperParameterOccurrence, P
+from .primitives import (
+    EmptyValue,
+    NotLiteralEvaluable,
+    NotLiteralNameException,
+)
+from .source_helper import Fingerprint, SourceHelper, file_fingerprint
+
+
+# ``ast.Constant`` is what the parser produces for literals since python 3.8
+_Constant = getattr(ast, "Constant", None)
+
+
+class ParseStatistics:
+    """Counters of the sources handled by a HyperParameterManager."""
+
+    def __init__(self) -> None:
+        self.num_parsed = 0
+        """Number of sources parsed with ``ast``."""
+
+        self.num_skipped = 0
+        """Number of sources rejected by :func:`may_contain_placeholder_call`."""
+
+        self.num_cache_hits = 0
+        """Number of files loaded from the parse cache or a manifest."""
+
+    def __repr__(self) -> str:
+        return "ParseStatistics(num_parsed={}, num_skipped={}, num_cache_hits={})".format(
+            self.num_parsed, self.num_skipped, self.num_cache_hits
+        )
+
+
+# Results of parse_file_occurrences
+PARSED = "parsed"
+SKIPPED = "skipped"
+CACHE_HIT = "cache_hit"
+
+
+def list_source_files(path: Union[str, List[str]]) -> List[str]:
+    """List python source files to be parsed.
+
+    :param path: The path to a python source code, directory, or a list of both
+
+    :return: sorted and deduplicated file paths
+    """
+    paths = None
+    if not isinstance(path, list):
+        paths = [path]
+    else:
+        paths = path
+
+    parsing_files = set()  # type: Set[str]
+    for _path in paths:
+        if os.path.isdir(_path):
+            for filename in sorted(
+                glob.glob(os.path.join(_path, "**/*.py"), recursive=True)
+            ):  # sort for debugging stability
+                if filename not in parsing_files:
+                    parsing_files.add(filename)
+        elif os.path.exists(_path):
+            # _path is a file
+            if _path not in parsing_files:
+                parsing_files.add(_path)
+        else:
+            raise FileNotFoundError(_path)
+
+    return sorted(parsing_files)  # sort for debugging stability
+
+
+@functools.lru_cache(maxsize=None)
+def _placeholder_call_pattern(placeholder: str) -> Pattern:
+    # Only whitespaces, line continuations, comments and closing parentheses
+    # (e.g. ``(_)('a', 1)``) may separate the name token of a call from its
+    # opening parenthesis.
+    return re.compile(
+        r"(?<!\w)" + re.escape(placeholder) + r"(?:\s|\\|#[^\n]*\n|\))*\("
+    )
+
+
+def may_contain_placeholder_call(source: str, placeholder: str) -> bool:
+    """A cheap textual pre-scan of the source code. Returns False only if the
+    source can not contain a call of the placeholder, in which case the
+    (much more expensive) ``ast.parse`` can be skipped. False positives,
+    e.g. a placeholder call in a string literal, are fine.
+
+    :param source: a string of python code
+    :param placeholder: placeholder name of the HyperParameterManager object
+    """
+    return _placeholder_call_pattern(placeholder).search(source) is not None
+
+
+def _candidate_lines(source: str, placeholder: str) -> Optional[List[int]]:
+    """Sorted line numbers on which a placeholder call may start, or None if
+    line numbers can not be computed reliably by counting newlines.
+    """
+    if "\r" in source:
+        return None
+
+    lines = []
+    pos, lineno = 0, 1
+    for match in _placeholder_call_pattern(placeholder).finditer(source):
+        lineno += source.count("\n", pos, match.start())
+        pos = match.start()
+        lines.append(lineno)
+    return lines
+
+
+def _iter_placeholder_calls(
+    root: ast.AST, placeholder: str, candidate_lines: Optional[List[int]]
+) -> Iterator[ast.Call]:
+    """Yield calls of the placeholder in the same (breadth-first) order as
+    ``ast.walk``, without descending into statements whose line range
+    contains none of the candidate lines.
+    """
+    todo = collections.deque([root])
+    while todo:
+        node = todo.popleft()
+        if candidate_lines is not None and isinstance(node, ast.stmt):
+            end_lineno = getattr(node, "end_lineno", None)  # python >= 3.8
+            if end_lineno is not None:
+                lineno = node.lineno
+                decorators = getattr(node, "decorator_list", None)
+                if decorators:
+                    # decorators precede the line of ``def`` or ``class``
+                    lineno = min(lineno, decorators[0].lineno)
+                i = bisect.bisect_left(candidate_lines, lineno)
+                if i == len(candidate_lines) or candidate_lines[i] > end_lineno:
+                    continue
+
+        todo.extend(ast.iter_child_nodes(node))
+        if (
+            type(node) is ast.Call
+            and type(node.func) is ast.Name  # noqa
+            and node.func.id == placeholder  # noqa
+        ):
+            yield node
+
+
+def _is_str_node(node: ast.AST) -> bool:
+    if _Constant is not None and type(node) is _Constant:
+        return isinstance(node.value, str)  # type: ignore
+    return isinstance(node, ast.Str)
+
+
+def _literal_eval(node: ast.AST) -> Any:
+    """A faster ``ast.literal_eval`` for the most common shapes of
+    hyperparameter values (constants, lists, tuples and dicts of them).
+    Everything else is delegated to ``ast.literal_eval``, so results and
+    raised exceptions are the same.
+    """
+    t = type(node)
+    if t is _Constant:
+        return node.value  # type: ignore
+    if t is ast.List:
+        return [_literal_eval(elt) for elt in node.elts]  # type: ignore
+    if t is ast.Tuple:
+        return tuple(_literal_eval(elt) for elt in node.elts)  # type: ignore
+    if t is ast.Dict and None not in node.keys:  # type: ignore
+        return {
+            _literal_eval(k): _literal_eval(v)
+            for k, v in zip(node.keys, node.values)  # type: ignore
+        }
+    return ast.literal_eval(node)
+
+
+def parse_source_occurrences(
+    source: str, filename: str, placeholder: str, keep_ast_nodes: bool = True
+) -> List[HyperParameterOccurrence]:
+    """Extract hyperparameter occurrences from source code without touching
+    any hyperparameter tree. This is the stateless half of
+    :meth:`.hpm.HyperParameterManager.parse_source`, so it can run in worker
+    processes.
+
+    :param source: a string of python code with correct line breakings
+    :param filename: filename of the python code
+    :param placeholder: placeholder name of the HyperParameterManager object
+    :param keep_ast_nodes: whether to keep references to the parsed ast nodes.
+        If False, the ast of the module can be garbage-collected right away,
+        and ``ast_node`` of occurrences will be parsed again on demand.
+
+    :return: list of occurrences in the order they are found
+    """
+    occurrences = []  # type: List[HyperParameterOccurrence]
+
+    root_node = ast.parse(source, filename)
+    candidate_lines = _candidate_lines(source, placeholder)
+    for node in _iter_placeholder_calls(root_node, placeholder, candidate_lines):
+        # Check the number of positional arguments
+        if len(node.args) < 1 or len(node.args) > 2:
+            raise Exception(
+                "number of positional args should be in range [1, 2], (was {} args), {}:L{}".format(
+                    len(node.args), filename, node.lineno
+                )
+            )
+
+        # Check hyperparameter name
+        if not _is_str_node(node.args[0]):
+            raise NotLiteralNameException(
+                "hp-name should be literal-string: L{}".format(node.lineno)
+            )
+
+        # Literal evaluate the hyperparameter name
+        name = _literal_eval(node.args[0])
+        lineno = node.lineno
+
+        # Parse the name and the default value
+        ast_node = None
+        source_span = None
+        if len(node.args) == 2:
+            ast_node = node.args[1]
+            source_span = (
+                ast_node.lineno,
+                ast_node.col_offset,
+                getattr(ast_node, "end_lineno", None),
+                getattr(ast_node, "end_col_offset", None),
+            )
+
+            try:
+                value = _literal_eval(node.args[1])
+            except ValueError:
+                value = NotLiteralEvaluable()
+        else:
+            value = EmptyValue()
+
+        # Parse hints
+        # IMPORTANT: we demand hints to be literal evaluable (for now)
+        hints = {}  # type: Dict[Any, Any]
+        for k in node.keywords:
+            try:
+                v = _literal_eval(k.value)
+            except ValueError:
+                raise NotLiteralEvaluable(
+                    "Value of hint keyword `{}` is not literal evaluable: \n{}".format(
+                        k.arg,
+                        SourceHelper.format_given_filename_and_source_and_lineno(
+                            filename, source, lineno
+                        ),
+                    )
+                )
+            hints[k.arg] = v
+
+        # Construct an occurrence
+        occurrences.append(
+            HyperParameterOccurrence(
+                name=name,
+                value=value,
+                filename=filename,
+                lineno=lineno,
+                ast_node=ast_node if keep_ast_nodes else None,
+                source_span=source_span,
+                hints=hints,
+                priority=P.PRIORITY_PARSED_FROM_SOURCE_CODE,
+            )
+        )
+
+    return occurrences
+
+
+def parse_file_occurrences(
+    filename: str,
+    placeholder: str,
+    cache_dir: Optional[str] = None,
+    keep_ast_nodes: bool = True,
+    source: Optional[str] = None,
+) -> Tuple[Fingerprint, List[HyperParameterOccurrence], str]:
+    """Read and parse a single file. Used as the task function of the worker
+    processes in :meth:`.hpm.HyperParameterManager.parse_file`.
+
+    :param filename: path to the python source code
+    :param placeholder: placeholder name of the HyperParameterManager object
+    :param cache_dir: if given, occurrences are looked up in and stored to a
+        :class:`.hpm_cache.ParseCache` in this directory. Files unchanged since
+        they were cached are not even read.
+    :param keep_ast_nodes: see :func:`parse_source_occurrences`
+    :param source: content of the file, if it has been read already (e.g.
+        by the import system, see :mod:`.hpm_import_hook`)
+
+    :return: a tuple of (fingerprint of the file, occurrences, how the file is
+        handled), the latter being one of :data:`PARSED`, :data:`SKIPPED`
+        and :data:`CACHE_HIT`
+    """
+    # fingerprint before reading, so that a concurrent edit results in a
+    # stale fingerprint rather than a stale cache entry or source helper
+    fingerprint = file_fingerprint(filename)
+
+    cache = None
+    if cache_dir is not None:
+        cache = ParseCache(cache_dir, placeholder)
+        occurrences = cache.load(filename, fingerprint)
+        if occurrences is not None:
+            return fingerprint, occurrences, CACHE_HIT
+
+    given_source = source is not None
+    if source is None:
+        with open(filename) as f:
+            source = f.read()
+
+    if not may_contain_placeholder_call(source, placeholder):
+        occurrences, status = [], SKIPPED
+    else:
+        occurrences = parse_source_occurrences(
+            source, filename, placeholder, keep_ast_nodes
+        )
+        status = PARSED
+
+    # a source read beforehand may be older than the fingerprint
+    if cache is not None and not given_source:
+        cache.store(filename, fingerprint, occurrences)
+    return fingerprint, occurrences, status
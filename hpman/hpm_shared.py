@@ -0,0 +1,149 @@
+import collections
+import mmap
+import os
+import pickle
+import struct
+import time
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# Number of forks of the current process, increased in the child process.
+# Cheaper than comparing pids on every read.
+_fork_count = 0
+
+
+def _after_fork_in_child() -> None:
+    global _fork_count
+    _fork_count += 1
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class SharedValueTable:
+    """Values written by setters of the process that owns the table,
+    published to its forked child processes through an anonymous shared
+    memory region, see :meth:`.hpm.HyperParameterManager.share`.
+
+    The region holds a header of (version, payload length) followed by the
+    pickled write log, a dict of name -> (version, value) of all published
+    writes. The version is a sequence lock: it is odd while the owner is
+    writing the region, and readers retry until they see the same even
+    version before and after copying the payload. Checking for new writes
+    is a single read of the version, without any IPC round-trip.
+    """
+
+    HEADER = struct.Struct("<QQ")
+    """Layout of the header: version and length of the payload."""
+
+    def __init__(self, size: int = 1 << 20) -> None:
+        """
+        :param size: bytes of the shared region. Publishing more (pickled)
+            values than it can hold raises :class:`ValueError`.
+        """
+        self.size = size
+        self._mmap = mmap.mmap(-1, size)
+        self._owner_pid = os.getpid()
+        self._owner_fork_count = _fork_count
+
+        # owner: the published write log
+        self._log = {}  # type: Dict[str, Tuple[int, Any]]
+        self._version = 0
+
+        # readers: the version last read, and the versions of applied writes
+        self._seen = 0
+        self._applied = {}  # type: Dict[str, int]
+
+    def is_owner(self) -> bool:
+        """Whether the current process is the one that created the table."""
+        if hasattr(os, "register_at_fork"):
+            return _fork_count == self._owner_fork_count
+        return os.getpid() == self._owner_pid  # pragma: no cover
+
+    def publish(self, values: Mapping[str, Any]) -> None:
+        """Publish writes of the owner. Must not be called concurrently.
+
+        :param values: flat dict of name -> value written
+        """
+        self.commit(self.prepare(values))
+
+    def prepare(self, values: Mapping[str, Any]) -> "PreparedWrite":
+        """Pickle the write log along with writes of the owner, without
+        publishing it yet, so that the writes can be checked before they are
+        applied. The result must be passed to :meth:`commit` before anything
+        else is prepared.
+
+        :param values: flat dict of name -> value written
+        :raise ValueError: if the log does not fit in the table
+        :raise pickle.PicklingError, TypeError: if a value can not be pickled
+        """
+        assert self.is_owner()
+        version = self._version + 2
+        log = dict(self._log)
+        for name, value in values.items():
+            log[name] = (version, value)
+
+        payload = pickle.dumps(log, protocol=pickle.HIGHEST_PROTOCOL)
+        if self.HEADER.size + len(payload) > self.size:
+            raise ValueError(
+                "{} bytes of shared values do not fit in the shared table of "
+                "{} bytes.".format(len(payload), self.size)
+            )
+        return PreparedWrite(version, log, payload, list(values))
+
+    def commit(self, prepared: "PreparedWrite") -> None:
+        """Publish writes prepared by :meth:`prepare`."""
+        assert prepared.version == self._version + 2
+        version, log, payload, names = prepared
+        mm = self._mmap
+        self.HEADER.pack_into(mm, 0, version - 1, 0)
+        mm[self.HEADER.size : self.HEADER.size + len(payload)] = payload
+        self.HEADER.pack_into(mm, 0, version, len(payload))
+
+        self._log = log
+        self._version = version
+        # processes forked from now on have seen these writes already
+        self._seen = version
+        for name in names:
+            self._applied[name] = version
+
+    def has_updates(self) -> bool:
+        """Whether values have been published since the last poll of the
+        current process. A single read of the version, without any lock."""
+        return self.HEADER.unpack_from(self._mmap, 0)[0] != self._seen
+
+    def poll(self, max_retries: int = 1000) -> Optional[Dict[str, Any]]:
+        """Get the values published since the last poll of the current
+        process.
+
+        :param max_retries: times to retry while the owner is writing
+        :return: flat dict of name -> value, or None if there is nothing new
+        """
+        mm = self._mmap
+        if not self.has_updates():
+            return None
+
+        for _i in range(max_retries):
+            version, length = self.HEADER.unpack_from(mm, 0)
+            if version % 2 == 0:
+                payload = mm[self.HEADER.size : self.HEADER.size + length]
+                if self.HEADER.unpack_from(mm, 0)[0] == version:
+                    break
+            time.sleep(0)
+        else:
+            return None  # the owner is stuck (or dead) in the middle of a write
+
+        self._seen = version
+        values = {}
+        for name, (stamp, value) in pickle.loads(payload).items():
+            if stamp > self._applied.get(name, 0):
+                self._applied[name] = stamp
+                values[name] = value
+        return values
+
+
+PreparedWrite = collections.namedtuple(
+    "PreparedWrite", ["version", "log", "payload", "names"]
+)
+"""Writes pickled by :meth:`SharedValueTable.prepare`: the version to
+publish, the write log, its pickled payload and the written names."""
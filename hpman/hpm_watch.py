@@ -0,0 +1,118 @@
+import threading
+import warnings
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+from .hpm_parser import list_source_files
+from .source_helper import Fingerprint, file_fingerprint
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .hpm import HyperParameterManager
+
+
+class HyperParameterWatcher(threading.Thread):
+    """A daemon thread that keeps a :class:`.hpm.HyperParameterManager` in
+    sync with edits of the source files it parsed.
+
+    Watched files are polled by their fingerprints (mtime and size); only
+    files that are added, modified or removed since the last poll are
+    reparsed or forgotten, see
+    :meth:`.hpm.HyperParameterManager.reparse_file`. Polling is used
+    since there is no portable file notification API in the standard library.
+    """
+
+    def __init__(
+        self,
+        hpm: "HyperParameterManager",
+        paths: Union[str, List[str]],
+        interval: float = 1.0,
+        debounce: float = 0.2,
+    ) -> None:
+        """
+        :param hpm: the manager to be updated
+        :param paths: file paths, directory names, or a list of both, akin to
+            :meth:`.hpm.HyperParameterManager.parse_file`. They are expected to
+            be parsed already; the current state is taken as the baseline.
+        :param interval: seconds between two polls
+        :param debounce: after a change is detected, wait until files are
+            unchanged for this many seconds before reparsing, so that a burst
+            of edits (e.g. saving many files) is applied at once
+        """
+        super().__init__(name="hpman-watcher", daemon=True)
+        self.hpm = hpm
+        self.paths = paths if isinstance(paths, list) else [paths]
+        self.interval = interval
+        self.debounce = debounce
+
+        self.last_error = None  # type: Optional[Exception]
+        """The last exception raised when reparsing a file."""
+
+        self._stop_event = threading.Event()
+        self._fingerprints = self.scan()
+
+    def scan(self) -> Dict[str, Fingerprint]:
+        """Get fingerprints of all watched files."""
+        fingerprints = {}
+        for path in self.paths:
+            try:
+                files = list_source_files(path)
+            except FileNotFoundError:
+                continue
+            for filename in files:
+                try:
+                    fingerprints[filename] = file_fingerprint(filename)
+                except OSError:  # removed during scanning
+                    pass
+        return fingerprints
+
+    def poll(self) -> List[str]:
+        """Check watched files once and update the manager accordingly.
+
+        :return: list of changed (added, modified or removed) files
+        """
+        fingerprints = self.scan()
+        if fingerprints == self._fingerprints:
+            return []
+
+        while self.debounce > 0:
+            if self._stop_event.wait(self.debounce):
+                return []
+            settled = self.scan()
+            if settled == fingerprints:
+                break
+            fingerprints = settled
+
+        changed = sorted(
+            filename
+            for filename in set(fingerprints) | set(self._fingerprints)
+            if fingerprints.get(filename) != self._fingerprints.get(filename)
+        )
+        self._fingerprints = fingerprints
+
+        for filename in changed:
+            try:
+                if filename in fingerprints:
+                    self.hpm.reparse_file(filename)
+                else:
+                    self.hpm.forget_file(filename)
+            except Exception as e:
+                # keep the previous occurrences and wait for the next edit
+                self.last_error = e
+                warnings.warn(
+                    "hpman: failed to reparse {}: {!r}".format(filename, e),
+                    RuntimeWarning,
+                )
+
+        return changed
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self.poll()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop watching and wait for the thread to exit.
+
+        :param timeout: maximum seconds to wait
+        """
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
@@ -1,9 +1,11 @@
+import threading
 from types import ModuleType
 from typing import Dict, List
 
 from .hpm import HyperParameterManager
 
 hpm_zoo = {}  # type: Dict[str, HyperParameterManager]
+_hpm_zoo_lock = threading.Lock()
 
 
 class HPMZooModule(ModuleType):
@@ -14,10 +16,14 @@ class HPMZooModule(ModuleType):
     __package__ == __name__
 
     def __getattr__(self, name):
-        if name in hpm_zoo:
-            return hpm_zoo[name]
-        hpm_zoo[name] = HyperParameterManager(name)
-        return hpm_zoo[name]
+        hpm = hpm_zoo.get(name)
+        if hpm is None:
+            with _hpm_zoo_lock:
+                # another thread may have created it meanwhile
+                hpm = hpm_zoo.get(name)
+                if hpm is None:
+                    hpm = hpm_zoo[name] = HyperParameterManager(name)
+        return hpm
 
     __path__ = []  # type: List[str]
     __file__ = __file__
@@ -18,6 +18,10 @@ class ImpossibleTree(ValueError):
     pass
 
 
+class FrozenManagerException(Exception):
+    pass
+
+
 # -- Sentinels
 class EmptyValue:
     pass
@@ -1,13 +1,88 @@
+import os
+from typing import List, Optional, Tuple
+
+Fingerprint = Tuple[int, int]
+
+
+def file_fingerprint(path: str) -> Fingerprint:
+    """Cheap fingerprint of a file's content: its modification time (in
+    nanoseconds) and size.
+    """
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
 class SourceHelper:
     """Helper class to format source code for debugging."""
 
-    def __init__(self, source: str) -> None:
-        """Create a SourceHelper given source code.
+    def __init__(
+        self,
+        source: Optional[str] = None,
+        *,
+        path: Optional[str] = None,
+        fingerprint: Optional[Fingerprint] = None
+    ) -> None:
+        """Create a SourceHelper given source code, or lazily given the path
+        of the source file.
 
         :param source: source code to be parsed
+        :param path: path to the source file. Only used if source is not given,
+            in which case the file is read only when lines are requested
+            (usually to format an error message). Nothing but the path and
+            the fingerprint is kept in memory.
+        :param fingerprint: :func:`file_fingerprint` of the file when it was
+            parsed. If given, a file modified afterwards is considered as
+            unavailable rather than showing unrelated lines.
+        """
+        self._lines = None  # type: Optional[List[str]]
+        if source is not None:
+            self._lines = source.split("\n")
+        self.path = path
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def lazy(
+        cls, path: str, fingerprint: Optional[Fingerprint] = None
+    ) -> "SourceHelper":
+        """Create a SourceHelper which reads the source file on demand.
+
+        :param path: path to the source file
+        :param fingerprint: :func:`file_fingerprint` of the file when it was parsed
         """
-        self.source = source
-        self.lines = source.split("\n")
+        return cls(path=path, fingerprint=fingerprint)
+
+    def _load_lines(self) -> Optional[List[str]]:
+        if self._lines is not None:
+            return self._lines
+        if self.path is None:
+            return None
+
+        try:
+            if (
+                self.fingerprint is not None
+                and file_fingerprint(self.path) != tuple(self.fingerprint)
+            ):
+                return None
+            with open(self.path) as f:
+                return f.read().split("\n")
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    @property
+    def available(self) -> bool:
+        """Whether the source code is available."""
+        return self._load_lines() is not None
+
+    @property
+    def lines(self) -> List[str]:
+        """Lines of the source code; empty if source is not available."""
+        lines = self._load_lines()
+        return lines if lines is not None else []
+
+    @property
+    def source(self) -> str:
+        """The source code; empty if source is not available."""
+        return "\n".join(self.lines)
 
     @classmethod
     def from_file(cls, path: str) -> "SourceHelper":
@@ -85,11 +160,23 @@ class SourceHelper:
         )
 
     def format_given_filename_and_lineno(
-        self, filename: str, lineno: int, **kwargs
+        self, filename: str, lineno: int, *, indent_spaces: int = 0, **kwargs
     ) -> str:
-        return self.format_given_filename_and_source_and_lineno(
-            filename, self.source, lineno, **kwargs
-        )
+        """Akin to :meth:`format_given_filename_and_source_and_lineno`, using
+        the source of this helper.
+
+        :param filename: file name to be displayed
+        :param lineno: line to be displayed
+        :param indent_spaces: number of spaces to be prepended at the prompt
+        """
+        prompt = " " * indent_spaces + "{}:{}".format(filename, lineno)
+        lines = self._load_lines()
+        if lines is None or not 1 <= lineno <= len(lines):
+            return prompt + "\n    (source is unavailable or modified since parsed)"
+
+        # a lazy helper reads the file only once here, and drops it afterwards
+        helper = self if lines is self._lines else type(self)("\n".join(lines))
+        return prompt + "\n" + helper.format_line_with_context(lineno)
 
     @classmethod
     def format_given_source_and_lineno(cls, source: str, lineno: int, **kwargs) -> str:
@@ -0,0 +1,32 @@
+import importlib
+import os
+import tempfile
+import unittest
+
+
+class SourceDirTestCase(unittest.TestCase):
+    """A test case with a temporary directory of source files, removed after
+    each test. Sources are written into ``self.src_dir``, which defaults to
+    the temporary directory ``self.tmpdir``."""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        self.tmpdir = self.src_dir = tmpdir.name
+
+    def write_source(self, name, content):
+        """Write a source file into ``self.src_dir``, and make sure its
+        modification time increases, even on coarse mtime resolution, so that
+        fingerprints and bytecode caches of the previous content are stale.
+
+        :return: path of the file
+        """
+        path = os.path.join(self.src_dir, name)
+        mtime_ns = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+        with open(path, "w") as f:
+            f.write(content)
+        st = os.stat(path)
+        if st.st_mtime_ns < mtime_ns + 10 ** 9:
+            os.utime(path, ns=(st.st_atime_ns, mtime_ns + 10 ** 9))
+        importlib.invalidate_caches()
+        return path
@@ -1,6 +1,8 @@
 import unittest
+from unittest import mock
 
 import hpman
+from hpman.hpm_db import HyperParamTree
 
 
 class TestCallable(unittest.TestCase):
@@ -79,3 +81,45 @@ class TestCallable(unittest.TestCase):
         self.assertEqual(_("a", 2), 2)
         self.assertEqual(_("a", 2), 2)
         self.assertEqual(_("a", 3), 3)
+
+    def test_call_site_cache(self):
+        _ = self.hpm
+        with mock.patch.object(
+            HyperParamTree,
+            "push_occurrence",
+            autospec=True,
+            side_effect=HyperParamTree.push_occurrence,
+        ) as push:
+            for _i in range(10):
+                self.assertEqual(_("a", 1), 1)
+                self.assertEqual(_("b.c", 0.5), 0.5)
+            self.assertEqual(push.call_count, 2)
+
+            # equal literals of immutable types hit the cache as well
+            self.assertEqual(_("s", "".join(["x", "y"])), "xy")
+            self.assertEqual(_("s", "".join(["x", "y"])), "xy")
+            self.assertEqual(push.call_count, 3)
+
+            # another default in between invalidates the cache
+            self.assertEqual(_("a", 2), 2)
+            self.assertEqual(_("a", 1), 1)
+            self.assertEqual(push.call_count, 5)
+
+            self.assertEqual(_("f", 0.0), 0.0)
+            self.assertEqual(str(_("f", -0.0)), "-0.0")
+
+    def test_call_site_cache_invalidation(self):
+        _ = self.hpm
+        self.assertEqual(_("a", 1), 1)
+        _.set_value("a", 2)
+        self.assertEqual(_("a", 1), 2)
+
+        self.assertEqual(_("b.c", 1), 1)
+        _.set_tree({"b": {"c": 3}})
+        self.assertEqual(_("b.c", 1), 3)
+
+        # a leaf turned into a branch by runtime setters
+        self.assertEqual(_("d", [1]), [1])
+        _.set_value("d.e", 1)
+        self.assertEqual(_("d"), {"e": 1})
+        self.assertNotEqual(_.tree.get("d").generation, _._call_cache["d"][3])
@@ -0,0 +1,153 @@
+import gc
+import threading
+import unittest
+from unittest import mock
+
+import hpman
+from hpman import FrozenManagerException
+from hpman.primitives import EmptyValue
+
+
+def _without_empty(value):
+    """Replace :class:`EmptyValue` objects, which are only equal to
+    themselves, by their type."""
+    if isinstance(value, EmptyValue):
+        return EmptyValue
+    if isinstance(value, (list, tuple)):
+        return type(value)(map(_without_empty, value))
+    if isinstance(value, dict):
+        return {k: _without_empty(v) for k, v in value.items()}
+    return value
+
+
+class TestFreeze(unittest.TestCase):
+    def setUp(self):
+        self.hpm = hpman.HyperParameterManager("_")
+        self.hpm.parse_source(
+            "_('lr', 0.1)\n"
+            "_('optimizer.type', 'sgd')\n"
+            "_('optimizer.momentum', 0.9)\n"
+            "_('model.backbone.depth', 50)\n"
+            "_('model.head', {'dim': 128})\n"
+            "_('empty')\n"
+        )
+        self.hpm.set_value("lr", 0.2)
+
+    def _reads(self):
+        hpm = self.hpm
+        return (
+            [hpm.get_value(k) for k in ["lr", "optimizer", "model.backbone", "model"]],
+            [hpm.get_tree(k) for k in ["", "optimizer", "model", "nope"]],
+            hpm.get_tree("model", annotate_dict=True),
+            [
+                hpm.exists(k)
+                for k in ["lr", "model", "model.head", "empty", "nope", "lr.x"]
+            ],
+            [hpm("lr", 0.1), hpm("model.head", {"dim": 128}), hpm("optimizer.type")],
+            hpm.get_values(),
+            [
+                (hpm.is_leaf_name(k), hpm.is_branch_name(k), hpm.count(k))
+                for k in ["", "lr", "model", "model.head", "empty", "nope"]
+            ],
+            [
+                occ and (occ.name, occ.value, occ.priority)
+                for occ in map(hpm.get_occurrence, ["lr", "model.head", "empty", "model"])
+            ],
+        )
+
+    def test_same_reads(self):
+        expected = self._reads()
+        self.assertIs(self.hpm.freeze(), self.hpm)
+        self.assertTrue(self.hpm.frozen)
+        self.assertEqual(self._reads(), expected)
+
+        # precomputed, but copied on reads
+        tree = self.hpm.get_tree("model")
+        tree["backbone"]["depth"] = 101
+        self.hpm.get_value("model")["backbone"] = None
+        self.hpm("model")["head"] = None
+        self.assertEqual(self._reads(), expected)
+        for name in ["empty", "nope", "lr.x"]:
+            with self.assertRaises(KeyError):
+                self.hpm.get_value(name)
+            with self.assertRaises(KeyError):
+                self.hpm(name)
+
+        self.hpm.unfreeze()
+        self.assertFalse(self.hpm.frozen)
+        self.assertEqual(self._reads(), expected)
+
+    def test_empty(self):
+        hpm = hpman.HyperParameterManager("_").freeze()
+        self.assertEqual(hpm.get_tree(), {})
+        self.assertFalse(hpm.exists("a"))
+
+    def test_reject_writes(self):
+        hpm = self.hpm.freeze()
+        for write in [
+            lambda: hpm.set_value("lr", 1),
+            lambda: hpm.set_values({"lr": 1}),
+            lambda: hpm.set_tree({"optimizer": {"type": "adam"}}),
+            lambda: hpm.parse_source("_('a', 1)"),
+            lambda: hpm.parse_file("."),
+            lambda: hpm.forget_file("<unknown>"),
+            lambda: hpm.reparse_file("<unknown>"),
+            lambda: hpm("new", 1),
+            lambda: hpm("empty", 1),
+        ]:
+            with self.assertRaises(FrozenManagerException):
+                write()
+
+        self.assertEqual(hpm("lr", 0.3), 0.2)
+        hpm.unfreeze().set_value("lr", 1)
+        self.assertEqual(hpm.get_value("lr"), 1)
+
+    def _hits(self):
+        hpm = self.hpm
+        names = ["", "lr", "model", "model.head", "optimizer.type"]
+        return (
+            [hpm.get_value(k) for k in names[1:]],
+            [hpm.get_tree(k) for k in ["", "optimizer", "model"]],
+            [hpm(k) for k in names[1:]],
+            [hpm.exists(k) for k in names],
+            [hpm.is_leaf_name(k) for k in names],
+            [hpm.is_branch_name(k) for k in names],
+            [hpm.count(k) for k in names],
+            [hpm.get_occurrence(k).value for k in names[1:] if k != "model"],
+            hpm.get_values(),
+        )
+
+    def test_seal(self):
+        expected = self._reads()
+        expected_hits = self._hits()
+        self.hpm.get_tree("model", annotate_dict=True)
+        with mock.patch.object(gc, "freeze", create=True) as gc_freeze:
+            self.assertIs(self.hpm.seal(), self.hpm)
+            gc_freeze.assert_not_called()
+            self.hpm.seal(gc_freeze=True)
+        if hasattr(gc, "freeze"):
+            gc_freeze.assert_called_once_with()
+        self.assertTrue(self.hpm.frozen)
+        self.assertIsNone(self.hpm.tree.get("model")._values_cache)
+
+        # reads do not touch the tree anymore, and values are unpickled
+        with mock.patch.object(self.hpm, "tree") as tree:
+            self.assertEqual(
+                _without_empty(self._hits()), _without_empty(expected_hits)
+            )
+        self.assertFalse(tree.mock_calls)
+        head = self.hpm.tree.get("model.head").node.value
+        self.assertEqual(self.hpm("model.head"), head)
+        self.assertIsNot(self.hpm("model.head"), head)
+
+        self.hpm.unfreeze()
+        self.assertEqual(self._reads(), expected)
+
+    def test_seal_unpicklable(self):
+        lock = threading.Lock()
+        self.hpm.set_value("lock", lock)
+        self.hpm.seal()
+        self.assertIs(self.hpm("lock"), lock)
+        self.assertIs(self.hpm.get_values()["lock"], lock)
+        self.assertIs(self.hpm.get_tree()["lock"], lock)
+        self.assertEqual(self.hpm("lr"), 0.2)
@@ -0,0 +1,52 @@
+import unittest
+
+import hpman
+
+
+class TestHandle(unittest.TestCase):
+    def setUp(self):
+        self.hpm = hpman.HyperParameterManager("_")
+        self.hpm.parse_source("_('optimizer.lr', 0.1)\n_('optimizer.momentum', 0.9)\n")
+
+    def test_read(self):
+        lr = self.hpm.handle("optimizer.lr")
+        self.assertIsInstance(lr, hpman.HyperParameterHandle)
+        self.assertEqual(lr.value, 0.1)
+        self.assertEqual(lr(), 0.1)
+        self.assertEqual(
+            self.hpm.handle("optimizer").value, {"lr": 0.1, "momentum": 0.9}
+        )
+
+    def test_live_value(self):
+        lr = self.hpm.handle("optimizer.lr")
+        self.assertEqual(lr.value, 0.1)
+        self.hpm.set_value("optimizer.lr", 0.01)
+        self.assertEqual(lr.value, 0.01)
+        self.hpm.set_tree({"optimizer": {"lr": 0.02}})
+        self.assertEqual(lr.value, 0.02)
+        self.hpm("optimizer.lr", 0.5)
+        self.assertEqual(lr.value, 0.02)
+
+    def test_no_lookup_when_unchanged(self):
+        lr = self.hpm.handle("optimizer.lr")
+        lr.value
+        self.hpm.tree._index = None
+        self.hpm.tree.children.clear()
+        self.assertEqual(lr.value, 0.1)
+
+    def test_missing(self):
+        h = self.hpm.handle("a.b")
+        with self.assertRaises(KeyError):
+            h.value
+        self.hpm.set_value("a.b", 1)
+        self.assertEqual(h.value, 1)
+
+    def test_retracted_and_recreated(self):
+        self.hpm.parse_source("_('x', 1)\n", filename="lib.py")
+        x = self.hpm.handle("x")
+        self.assertEqual(x.value, 1)
+        self.hpm.forget_file("lib.py")
+        with self.assertRaises(KeyError):
+            x.value
+        self.hpm.parse_source("_('x', 2)\n", filename="lib.py")
+        self.assertEqual(x.value, 2)
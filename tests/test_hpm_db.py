@@ -1,8 +1,16 @@
+import copy
+import pickle
 import unittest
 
 import hpman
-from hpman.hpm_db import HyperParameterOccurrence, HyperParamNode, HyperParamTree, P
-from hpman.primitives import DoubleAssignmentException, EmptyValue
+from hpman.hpm_db import (
+    EMPTY_HINTS,
+    HyperParameterOccurrence,
+    HyperParamNode,
+    HyperParamTree,
+    P,
+)
+from hpman.primitives import DoubleAssignmentException, EmptyValue, ImpossibleTree
 from hpman.source_helper import SourceHelper
 
 
@@ -78,3 +86,244 @@ class TestHyperParamNode(unittest.TestCase):
         node.push(occs[0])
         with self.assertRaises(DoubleAssignmentException):
             node._check_source_code_double_assigment(occs[1])
+
+    def test_source_default_index(self):
+        node = HyperParamNode(name="hp")
+        occs = [
+            HyperParameterOccurrence(
+                name="hp",
+                value=v,
+                priority=P.PRIORITY_PARSED_FROM_SOURCE_CODE,
+                lineno=i,
+                filename="none",
+                source_helper=SourceHelper(""),
+            )
+            for i, v in enumerate([EmptyValue(), 1, EmptyValue(), 2])
+        ]
+        for occ in occs:
+            node.push(occ)
+        self.assertEqual([occ.lineno for occ in node.db], [1, 3, 0, 2])
+
+        with self.assertRaises(DoubleAssignmentException):
+            node._check_source_code_double_assigment(occs[3])
+
+        node.remove(occs[1])
+        self.assertEqual(node.value, 2)
+        node.remove(occs[3])
+        node._check_source_code_double_assigment(occs[3])
+        self.assertIsInstance(node.value, EmptyValue)
+        self.assertEqual([occ.lineno for occ in node.db], [0, 2])
+
+    def test_priority_slots(self):
+        def occ(value, priority):
+            return HyperParameterOccurrence(
+                name="hp", value=value, priority=priority, filename="none"
+            )
+
+        node = HyperParamNode(name="hp")
+        parsed = [
+            occ(EmptyValue(), P.PRIORITY_PARSED_FROM_SOURCE_CODE) for _ in range(3)
+        ]
+        for item in parsed:
+            node.push(item)
+        self.assertIs(node.get(), parsed[0])
+
+        default = occ(0, P.PRIORITY_PARSED_FROM_SOURCE_CODE)
+        callable_empty = occ(EmptyValue(), P.PRIORITY_SET_FROM_CALLABLE)
+        callables = [occ(i, P.PRIORITY_SET_FROM_CALLABLE) for i in range(1, 3)]
+        setter = occ(3, P.PRIORITY_SET_FROM_SETTER)
+        for item in [default, callable_empty] + callables:
+            node.push(item)
+        self.assertEqual(node.value, 2)
+        self.assertEqual(node.db, [callables[1], callable_empty, default] + parsed)
+        self.assertEqual(len(node), 6)
+
+        node.push(setter)
+        self.assertIs(node.get(), setter)
+        self.assertFalse(node.remove(callables[0]))
+        self.assertTrue(node.remove(setter))
+        self.assertTrue(node.remove(callables[1]))
+        self.assertIs(node.get(), callable_empty)
+        self.assertTrue(node.remove(callable_empty))
+        self.assertIs(node.get(), default)
+        self.assertTrue(node.remove(default))
+        self.assertIs(node.get(), parsed[0])
+
+
+class TestHyperParameterOccurrence(unittest.TestCase):
+    def test_compact(self):
+        hpm = hpman.HyperParameterManager("_").parse_source(
+            "_('a', 1)\n_('a')\n_('b', 2, range=[0, 3])\n", filename="".join(["x", ".py"])
+        )
+        a, a_empty = hpm.tree.get("a").node.db
+        b = hpm.get_occurrence("b")
+        for obj in [a, hpm.tree, hpm.tree.get("a").node]:
+            self.assertFalse(hasattr(obj, "__dict__"))
+        self.assertIs(a.filename, b.filename)
+        self.assertIs(a.hints, EMPTY_HINTS)
+        self.assertIs(a_empty.hints, EMPTY_HINTS)
+        self.assertEqual(b.hints, {"range": [0, 3]})
+
+        occ = HyperParameterOccurrence(name="c", priority=P.PRIORITY_SET_FROM_SETTER)
+        self.assertIsInstance(occ.value, EmptyValue)
+        self.assertIsNone(occ.hints)
+        self.assertIsNone(occ.filename)
+        with self.assertRaises(AttributeError):
+            occ.unknown_attribute = 1
+        self.assertIsNone(HyperParameterOccurrence(value=1).name)
+
+    def test_empty_hints(self):
+        self.assertEqual(EMPTY_HINTS, {})
+        for change in [
+            lambda: EMPTY_HINTS.__setitem__("a", 1),
+            lambda: EMPTY_HINTS.update(a=1),
+            lambda: EMPTY_HINTS.setdefault("a", 1),
+        ]:
+            with self.assertRaises(TypeError):
+                change()
+        self.assertEqual(EMPTY_HINTS, {})
+        self.assertIs(pickle.loads(pickle.dumps(EMPTY_HINTS)), EMPTY_HINTS)
+        self.assertIs(copy.deepcopy(EMPTY_HINTS), EMPTY_HINTS)
+
+    def test_pickle(self):
+        hpm = hpman.HyperParameterManager("_").parse_source("_('a', [1])\n")
+        occ = pickle.loads(pickle.dumps(hpm.get_occurrence("a")))
+        self.assertEqual(occ.value, [1])
+        self.assertIs(occ.hints, EMPTY_HINTS)
+        self.assertEqual(occ.source_span, hpm.get_occurrence("a").source_span)
+        self.assertEqual(occ.source_helper.source, "_('a', [1])\n")
+
+
+class TestHyperParamTree(unittest.TestCase):
+    def _occ(self, name, value=EmptyValue(), lineno=1):
+        return HyperParameterOccurrence(
+            name=name,
+            value=value,
+            priority=P.PRIORITY_PARSED_FROM_SOURCE_CODE,
+            lineno=lineno,
+            filename="none",
+        )
+
+    def test_push_occurrences(self):
+        tree = HyperParamTree()
+        occs = [self._occ("a.b", lineno=i) for i in range(100)]
+        occs.insert(50, self._occ("a.b", 1, lineno=1000))
+        occs.append(self._occ("c", 2))
+        tree.push_occurrences(occs, source_helper=SourceHelper(""))
+
+        self.assertEqual(tree.count(), 2)
+        self.assertEqual(tree.get("a.b").node.value, 1)
+        self.assertEqual(
+            [occ.lineno for occ in tree.get("a.b").node.db],
+            [1000] + list(range(100)),
+        )
+
+        with self.assertRaises(DoubleAssignmentException):
+            tree.push_occurrences([self._occ("c", 3)], source_helper=SourceHelper(""))
+
+    def test_push_occurrences_validation(self):
+        tree = HyperParamTree()
+        with self.assertRaises(ImpossibleTree):
+            tree.push_occurrences([self._occ("a", 1), self._occ("a.b", 2)])
+
+    def test_flat_index(self):
+        tree = HyperParamTree()
+        occs = [self._occ("a.b.c", 1), self._occ("a.d", 2), self._occ("e", 3)]
+        tree.push_occurrences(occs)
+        self.assertEqual(set(tree._index), {"a", "a.b", "a.b.c", "a.d", "e"})
+        for key in tree._index:
+            self.assertIs(tree.get(key), tree._index[key])
+            self.assertIs(tree.get(key), tree._allocate(key))
+        self.assertIs(tree.get("a").get("b.c"), tree.get("a.b.c"))
+        self.assertIs(tree.get("a."), tree.get("a"))
+        self.assertIsNone(tree.get("a.x"))
+
+        tree.retract_occurrence(occs[0])
+        self.assertEqual(set(tree._index), {"a", "a.d", "e"})
+        self.assertIsNone(tree.get("a.b"))
+
+    def test_flat_index_through_subtree(self):
+        tree = HyperParamTree()
+        tree.push_occurrence(self._occ("a.b", 1))
+        sub = tree.get("a")
+        sub["c"] = 2
+        occ = self._occ("x.y", 3)
+        sub.push_occurrence(occ)
+        self.assertEqual(set(tree._index), {"a", "a.b", "a.c", "a.x", "a.x.y"})
+        self.assertIs(tree.get("a.c"), sub.get("c"))
+        self.assertEqual(tree.get("a.x.y").node.value, 3)
+
+        sub.retract_occurrence(occ)
+        self.assertEqual(set(tree._index), {"a", "a.b", "a.c"})
+        self.assertIsNone(tree.get("a.x"))
+
+    def test_tree_values_cache(self):
+        tree = HyperParamTree()
+        tree.push_occurrences(
+            [self._occ("a.b", 1), self._occ("a.c", {"x": 1}), self._occ("d.e", 2)]
+        )
+        values = tree._tree_values(annotate_dict=False)
+        self.assertEqual(values, {"a": {"b": 1, "c": {"x": 1}}, "d": {"e": 2}})
+        self.assertIs(tree._tree_values(annotate_dict=False), values)
+        self.assertIs(values["a"], tree.get("a")._tree_values(annotate_dict=False))
+        annotated = tree.tree_values(annotate_dict=True)
+        self.assertTrue(annotated["a"]["c"][HyperParamTree.DICT_ANNOTATION])
+        self.assertIs(type(annotated["a"]["c"]), dict)
+        # annotated copies of dict values are not shared either
+        annotated["a"]["c"].pop(HyperParamTree.DICT_ANNOTATION)
+        self.assertEqual(
+            tree.tree_values(annotate_dict=True)["a"]["c"],
+            {"x": 1, HyperParamTree.DICT_ANNOTATION: True},
+        )
+        self.assertNotIn(HyperParamTree.DICT_ANNOTATION, values["a"]["c"])
+
+        # callers get copies of the cached dicts
+        copied = tree.tree_values()
+        self.assertIsNot(copied["a"], values["a"])
+        copied["a"]["b"] = 2
+        self.assertEqual(tree.tree_values()["a"]["b"], 1)
+
+        d_values = values["d"]
+        tree["a.b"] = 3
+        new_values = tree._tree_values(annotate_dict=False)
+        self.assertEqual(new_values, {"a": {"b": 3, "c": {"x": 1}}, "d": {"e": 2}})
+        self.assertEqual(values["a"]["b"], 1)
+        # untouched subtrees are not rebuilt
+        self.assertIs(new_values["d"], d_values)
+
+    def test_leaf_counters(self):
+        def check(tree):
+            self.assertEqual(tree.count(), len(list(tree.flatten())))
+            for child in tree.children.values():
+                check(child)
+
+        tree = HyperParamTree()
+        occs = [
+            self._occ("a.b", 1),
+            self._occ("a.b"),
+            self._occ("a.c"),
+            self._occ("a.c", 2, lineno=2),
+            self._occ("d", 3),
+        ]
+        tree.push_occurrences(occs)
+        self.assertEqual(tree.count(), 3)
+        check(tree)
+
+        # a leaf turned into a branch in runtime, and back
+        tree["d.e"] = 4
+        tree["d.f"] = EmptyValue()
+        self.assertEqual(tree.get("d").count(), 1)
+        check(tree)
+        tree.retract_occurrence(tree.get("d.e").node.get())
+        tree.retract_occurrence(tree.get("d.f").node.get())
+        self.assertIsNone(tree.get("d.e"))
+        self.assertEqual(tree.get("d").count(), 1)
+        check(tree)
+
+        tree.retract_occurrence(occs[3])
+        self.assertEqual(tree.count(), 2)
+        check(tree)
+        for occ in occs:
+            tree.retract_occurrence(occ)
+        self.assertEqual(tree.count(), 0)
+        self.assertTrue(tree.empty)
@@ -0,0 +1,131 @@
+import importlib
+import os
+import sys
+from unittest import mock
+
+import hpman
+from helpers import SourceDirTestCase
+from hpman import hpm_parser
+from hpman.hpm_import_hook import HyperParameterImportHook, _HyperParameterLoader
+
+
+class TestImportHook(SourceDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.tmpdir
+        self.pkg_dir = self.src_dir = os.path.join(self.root, "hpman_hook_pkg")
+        os.makedirs(self.pkg_dir)
+        self.write_source("__init__.py", "")
+        self.write_source(
+            "models.py", "from hpman.m import _\nDEPTH = _('model.depth', 50)\n"
+        )
+        self.write_source("unused.py", "from hpman.m import _\n_('unused', 1)\n")
+        self.write_source("plain.py", "x = 1\n")
+        sys.path.insert(0, self.root)
+        self.hooks = []
+
+    def tearDown(self):
+        for hook in self.hooks:
+            hook.uninstall()
+        sys.path.remove(self.root)
+        for name in list(sys.modules):
+            if name.startswith("hpman_hook_pkg"):
+                del sys.modules[name]
+        importlib.invalidate_caches()
+
+    def _install(self, hpm, **kwargs):
+        hook = hpm.install_import_hook(**kwargs)
+        self.hooks.append(hook)
+        return hook
+
+    def _unload(self):
+        for name in list(sys.modules):
+            if name.startswith("hpman_hook_pkg"):
+                del sys.modules[name]
+
+    def test_import(self):
+        hpm = hpman.HyperParameterManager("_")
+        hook = self._install(hpm, paths=self.root)
+        self.assertIsInstance(hook, HyperParameterImportHook)
+        self.assertLess(
+            sys.meta_path.index(hook),
+            sys.meta_path.index(importlib.machinery.PathFinder),
+        )
+
+        # the source read by the import system is reused
+        with mock.patch.object(
+            hpm_parser, "open", create=True, side_effect=AssertionError
+        ):
+            import hpman_hook_pkg.models  # noqa: F401
+            import hpman_hook_pkg.plain  # noqa: F401
+
+        self.assertEqual(hpm.get_values(), {"model.depth": 50})
+        occ = hpm.get_occurrence("model.depth")
+        self.assertEqual(occ.filename, os.path.join(self.pkg_dir, "models.py"))
+        self.assertEqual(occ.lineno, 2)
+        self.assertEqual(hpm.parse_stats.num_parsed, 1)
+        self.assertEqual(hpm.parse_stats.num_skipped, 2)
+
+        # from the bytecode cache, with another hook installed
+        self._unload()
+        hpm2 = hpman.HyperParameterManager("_")
+        self._install(hpm2, paths=self.root)
+        with mock.patch.object(
+            _HyperParameterLoader,
+            "source_to_code",
+            autospec=True,
+            side_effect=_HyperParameterLoader.source_to_code,
+        ) as source_to_code:
+            import hpman_hook_pkg.models  # noqa: F401,F811
+        if not sys.dont_write_bytecode:
+            source_to_code.assert_not_called()
+
+        self.assertEqual(hpm2.get_values(), {"model.depth": 50})
+        self.assertEqual(hpm.get_values(), {"model.depth": 50})
+
+        hook.uninstall()
+        self.assertNotIn(hook, sys.meta_path)
+
+    def test_reload(self):
+        hpm = hpman.HyperParameterManager("_")
+        self._install(hpm, paths=[self.pkg_dir])
+        import hpman_hook_pkg.models
+
+        self.write_source(
+            "models.py", "from hpman.m import _\nDEPTH = _('model.width', 64)\n"
+        )
+        importlib.reload(hpman_hook_pkg.models)
+        self.assertEqual(hpm.get_values(), {"model.width": 64})
+
+    def test_paths(self):
+        hpm = hpman.HyperParameterManager("_")
+        self._install(hpm, paths=os.path.join(self.pkg_dir, "unused.py"))
+        import hpman_hook_pkg.models  # noqa: F401
+        import hpman_hook_pkg.unused  # noqa: F401
+
+        self.assertEqual(hpm.get_values(), {"unused": 1})
+
+        hook = HyperParameterImportHook(hpm, self.root)
+        self.assertTrue(hook.is_watched(os.path.join(self.pkg_dir, "models.py")))
+        self.assertFalse(hook.is_watched(os.__file__))
+        with self.assertRaises(TypeError):
+            HyperParameterImportHook(hpm)  # paths are required
+
+    def test_errors(self):
+        hpm = hpman.HyperParameterManager("_")
+        hpm.parse_source("_('model.depth', 18)\n")
+        self._install(hpm, paths=self.root)
+        with self.assertRaises(hpman.DoubleAssignmentException):
+            import hpman_hook_pkg.models  # noqa: F401
+
+    def test_frozen(self):
+        hpm = hpman.HyperParameterManager("_")
+        self._install(hpm, paths=self.root)
+        hpm.seal()
+        # modules without hyperparameters are not a write
+        import hpman_hook_pkg.plain  # noqa: F401
+
+        with self.assertRaises(hpman.FrozenManagerException) as cm:
+            import hpman_hook_pkg.unused  # noqa: F401
+        self.assertIn("unused.py", str(cm.exception))
+        self.assertEqual(hpm.get_values(), {})
@@ -0,0 +1,101 @@
+import os
+from unittest import mock
+
+import hpman
+from helpers import SourceDirTestCase
+from hpman import hpm_manifest
+from hpman.hpm_manifest import HyperParameterManifest
+
+
+class TestManifest(SourceDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src_dir = os.path.join(self.tmpdir, "src")
+        os.makedirs(self.src_dir)
+        self.manifest = os.path.join(self.tmpdir, "hpman.manifest")
+        self.lib = self.write_source(
+            "lib.py", "_('a', 1, choices=[1, 2])\n_('b.c', [1, 'x'])\n"
+        )
+        self.main = self.write_source("main.py", "_('a')\n_('d', {'e': 2})\n")
+        self.other = self.write_source("other.py", "print('no hyperparameters')\n")
+
+    def _export(self):
+        hpm = hpman.HyperParameterManager("_").parse_file(self.src_dir)
+        hpm.export_manifest(self.manifest)
+        return hpm
+
+    def test_load(self):
+        parsed = self._export()
+        with mock.patch("hpman.hpm.parse_file_occurrences") as parse:
+            hpm = hpman.HyperParameterManager("_").load_manifest(self.manifest)
+        parse.assert_not_called()
+
+        self.assertEqual(hpm.get_tree(), parsed.get_tree())
+        self.assertEqual(hpm.parse_stats.num_cache_hits, 3)
+        occ = hpm.get_occurrence("a")
+        self.assertEqual((occ.filename, occ.lineno), (self.lib, 1))
+        self.assertEqual(occ.hints, {"choices": [1, 2]})
+        self.assertEqual(occ.source_helper.lines[0], "_('a', 1, choices=[1, 2])")
+        self.assertIsInstance(occ.ast_node, type(parsed.get_occurrence("a").ast_node))
+        self.assertEqual(len(hpm.tree.get("a").node), 2)
+
+        # loaded files can be handled like parsed ones
+        hpm.forget_file(self.lib)
+        self.assertFalse(hpm.exists("a"))
+
+    def test_stale(self):
+        self._export()
+        manifest = HyperParameterManifest.read(self.manifest)
+        self.assertEqual(manifest.stale_files(), [])
+
+        # touched, e.g. by a checkout: only the digest is compared
+        self.write_source("main.py", "_('a')\n_('d', {'e': 2})\n")
+        with mock.patch.object(
+            hpm_manifest, "file_digest", wraps=hpm_manifest.file_digest
+        ) as digest:
+            self.assertEqual(manifest.stale_files(), [])
+        digest.assert_called_once_with(self.main)
+
+        self.write_source("lib.py", "_('a', 3)\n")
+        os.unlink(self.other)
+        self.assertEqual(manifest.stale_files(), [self.lib, self.other])
+
+        hpm = hpman.HyperParameterManager("_").load_manifest(self.manifest)
+        self.assertEqual(hpm.get_values(), {"a": 3, "d": {"e": 2}})
+        self.assertEqual(hpm.parse_stats.num_parsed, 1)
+        self.assertEqual(hpm.parse_stats.num_cache_hits, 1)
+
+        hpm = hpman.HyperParameterManager("_").load_manifest(
+            self.manifest, check_stale=False
+        )
+        self.assertEqual(hpm.get_values(), {"a": 1, "b.c": [1, "x"], "d": {"e": 2}})
+
+    def test_modified_after_parsing(self):
+        hpm = hpman.HyperParameterManager("_").parse_file(self.src_dir)
+        self.write_source("lib.py", "_('a', 1, choices=[1, 2])\n_('b.c', [1, 'x'])\n")
+        hpm.export_manifest(self.manifest)
+        # the parsed content is unknown, even if it is the same
+        manifest = HyperParameterManifest.read(self.manifest)
+        self.assertEqual(manifest.stale_files(), [self.lib])
+
+    def test_failed_reparse(self):
+        hpm = hpman.HyperParameterManager("_").parse_file(self.src_dir)
+        self.write_source("lib.py", "_('a', \n")
+        with self.assertRaises(SyntaxError):
+            hpm.reparse_file(self.lib)
+        # the file keeps its previous occurrences and fingerprint
+        hpm.export_manifest(self.manifest)
+        manifest = HyperParameterManifest.read(self.manifest)
+        self.assertEqual(sorted(manifest.files), [self.lib, self.main, self.other])
+        self.assertEqual(manifest.stale_files(), [self.lib])
+        self.assertEqual(
+            [occ.name for occ in manifest.occurrences(self.lib)], ["a", "b.c"]
+        )
+
+    def test_incompatible(self):
+        self._export()
+        with self.assertRaises(ValueError):
+            hpman.HyperParameterManager("hp").load_manifest(self.manifest)
+        with mock.patch.object(HyperParameterManifest, "FORMAT_VERSION", 0):
+            with self.assertRaises(ValueError):
+                hpman.HyperParameterManager("_").load_manifest(self.manifest)
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import unittest
+
+import hpman
+from hpman.hpm_db import HyperParamTree
+from hpman.primitives import ImpossibleTree
+
+
+class TestOverride(unittest.TestCase):
+    def setUp(self):
+        self.hpm = hpman.HyperParameterManager("_")
+        self.hpm.parse_source(
+            "_('lr', 0.1)\n"
+            "_('optimizer.type', 'sgd')\n"
+            "_('optimizer.momentum', 0.9)\n"
+            "_('model.head', {'dim': 128})\n"
+        )
+
+    def test_override(self):
+        _ = self.hpm
+        tree = _.get_tree()
+        values = _.get_values()
+        _.set_value("lr", 0.2)
+
+        with _.override({"lr": 0.01, "optimizer.momentum": 0.5, "new.x": 1}) as hpm:
+            self.assertIs(hpm, _)
+            self.assertEqual(_("lr"), 0.01)
+            self.assertEqual(_("lr", 0.1), 0.01)
+            self.assertEqual(_.get_value("optimizer"), {"type": "sgd", "momentum": 0.5})
+            self.assertEqual(_.get_value("new"), {"x": 1})
+            self.assertEqual(
+                _.get_tree(),
+                {
+                    "lr": 0.01,
+                    "optimizer": {"type": "sgd", "momentum": 0.5},
+                    "model": {"head": {"dim": 128}},
+                    "new": {"x": 1},
+                },
+            )
+            self.assertEqual(_.get_values()["optimizer.momentum"], 0.5)
+            self.assertTrue(_.exists("new"))
+            self.assertTrue(_.is_branch_name("new"))
+            self.assertTrue(_.is_leaf_name("new.x"))
+            self.assertEqual(_.count(), 5)
+            self.assertEqual(_.count("optimizer"), 2)
+
+            with _.override({"lr": 0.02, "model.head": {"dim": 64}}):
+                self.assertEqual(_("lr"), 0.02)
+                self.assertEqual(_("optimizer.momentum"), 0.5)
+                self.assertEqual(
+                    _.get_tree("model", annotate_dict=True),
+                    {"head": {"dim": 64, HyperParamTree.DICT_ANNOTATION: True}},
+                )
+            self.assertEqual(_("lr"), 0.01)
+
+        self.assertEqual(_("lr"), 0.2)
+        self.assertFalse(_.exists("new"))
+        self.assertEqual(_.count(), 4)
+        # the shared values are not touched
+        self.assertEqual(tree["optimizer"]["momentum"], 0.9)
+        self.assertEqual(values["optimizer.momentum"], 0.9)
+
+    def test_handle_and_frozen(self):
+        _ = self.hpm
+        lr = _.handle("lr")
+        self.assertEqual(lr.value, 0.1)
+        _.freeze()
+        with _.override({"lr": 0.01}):
+            self.assertEqual(lr.value, 0.01)
+            self.assertEqual(_("lr"), 0.01)
+            self.assertEqual(_("lr", 0.1), 0.01)
+        self.assertEqual(lr.value, 0.1)
+        self.assertEqual(_("lr"), 0.1)
+
+    def test_default_recorded(self):
+        _ = self.hpm
+        with _.override({"a": 1}):
+            self.assertEqual(_("a", 2), 1)
+        self.assertEqual(_("a"), 2)
+
+    def test_invalid(self):
+        for values in [
+            {"optimizer": 1},
+            {"lr.x": 1},
+            {"model.head.dim": 1},
+            {"a": 1, "a.b": 2},
+            {"": 1},
+        ]:
+            with self.assertRaises(ImpossibleTree):
+                self.hpm.override(values)
+
+    def test_threads(self):
+        _ = self.hpm
+        barrier = threading.Barrier(4)
+        results = {}
+
+        def run(i):
+            with _.override({"lr": i}):
+                barrier.wait()
+                results[i] = _("lr")
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, {i: i for i in range(4)})
+
+    def test_asyncio(self):
+        _ = self.hpm
+
+        async def evaluate(i):
+            async with _.override({"optimizer.momentum": i}):
+                await asyncio.sleep(0.01)
+                return _.get_value("optimizer")["momentum"]
+
+        async def main():
+            return await asyncio.gather(*[evaluate(i) for i in range(10)])
+
+        loop = asyncio.new_event_loop()
+        try:
+            self.assertEqual(loop.run_until_complete(main()), list(range(10)))
+        finally:
+            loop.close()
+        self.assertEqual(_("optimizer.momentum"), 0.9)
@@ -0,0 +1,75 @@
+import ast
+import os
+from unittest import mock
+
+import hpman
+from helpers import SourceDirTestCase
+from hpman import hpm_cache
+from hpman.hpm_cache import ParseCache, file_fingerprint
+
+
+class TestParseCache(SourceDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.src_dir = os.path.join(self.tmpdir, "src")
+        self.cache_dir = os.path.join(self.tmpdir, "cache")
+        os.makedirs(self.src_dir)
+        self.path = self.write_source(
+            "lib.py", "_('a', 1, choices=[1, 2])\n_('b', [1, 'x'])\n_('a')\n"
+        )
+
+    def _parse(self, placeholder="_"):
+        return hpman.HyperParameterManager(placeholder).parse_file(
+            self.src_dir, cache_dir=self.cache_dir
+        )
+
+    def test_warm_launch(self):
+        cold = self._parse()
+        self.assertIsNotNone(cold.get_occurrence("a").ast_node)
+
+        warm = self._parse()
+        self.assertEqual(warm.parse_stats.num_cache_hits, 1)
+        self.assertEqual(warm.parse_stats.num_parsed, 0)
+        # ast nodes of cached occurrences are parsed on demand
+        self.assertEqual(
+            ast.dump(warm.get_occurrence("b").ast_node, include_attributes=True),
+            ast.dump(cold.get_occurrence("b").ast_node, include_attributes=True),
+        )
+        self.assertEqual(warm.get_values(), cold.get_values())
+        self.assertEqual(
+            [(o.lineno, o.hints) for o in warm.tree.get("a").node.db],
+            [(o.lineno, o.hints) for o in cold.tree.get("a").node.db],
+        )
+
+    def test_invalidate_on_change(self):
+        self._parse()
+        self.write_source("lib.py", "_('a', 2)\n")
+        m = self._parse()
+        self.assertEqual(m.get_values(), {"a": 2})
+
+    def test_invalidate_on_placeholder_and_version(self):
+        self._parse()
+        cache = ParseCache(self.cache_dir, "_")
+        fp = file_fingerprint(self.path)
+        self.assertIsNotNone(cache.load(self.path, fp))
+        self.assertIsNone(ParseCache(self.cache_dir, "hp").load(self.path, fp))
+
+        with mock.patch.object(hpm_cache, "__version__", "0.0.0"):
+            self.assertIsNone(cache.load(self.path, fp))
+
+    def test_corrupted_entry(self):
+        self._parse()
+        for name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, name), "wb") as f:
+                f.write(b"garbage")
+
+        m = self._parse()
+        self.assertEqual(m.get_value("a"), 1)
+        self.assertEqual(m.parse_stats.num_parsed, 1)
+
+    def test_double_assignment_from_cache(self):
+        self._parse()
+        with open(os.path.join(self.src_dir, "other.py"), "w") as f:
+            f.write("_('a', 3)\n")
+        with self.assertRaises(hpman.DoubleAssignmentException):
+            self._parse()
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import unittest
 
 import hpman
@@ -39,6 +40,15 @@ class TestParse(unittest.TestCase):
         )
         self.assertEqual(m.tree.count(), 2 * 9)
 
+    def test_parse_file_stats(self):
+        m = self._create_hpm().parse_file(f("test_files/"))
+        self.assertEqual(m.parse_stats.num_parsed, 3)
+        self.assertEqual(m.parse_stats.num_skipped, 0)
+
+        m = hpman.HyperParameterManager("hp").parse_file(f("test_files/"))
+        self.assertEqual(m.parse_stats.num_parsed, 0)
+        self.assertEqual(m.parse_stats.num_skipped, 3)
+
     def test_parse_file_with_non_exist_path(self):
         self.assertRaises(
             FileNotFoundError, self._create_hpm().parse_file, "none_exist_path"
@@ -67,3 +77,33 @@ class TestParse(unittest.TestCase):
             self.assertEqual(m.tree.count(), 27)
         except Exception as e:
             self.fail("duplication path should be removed: {}".format(e))
+
+    def test_parse_file_parallel(self):
+        serial = self._create_hpm().parse_file(f("test_files/"))
+        parallel = self._create_hpm().parse_file(f("test_files/"), num_workers=2)
+        self.assertEqual(parallel.tree.count(), serial.tree.count())
+        self.assertEqual(
+            {k: repr(v) for k, v in parallel.get_values().items()},
+            {k: repr(v) for k, v in serial.get_values().items()},
+        )
+        for node in serial.get_nodes():
+            self.assertEqual(
+                [(occ.filename, occ.lineno) for occ in node.db],
+                [
+                    (occ.filename, occ.lineno)
+                    for occ in parallel.tree.get(node.name).node.db
+                ],
+            )
+
+    def test_parse_file_parallel_double_assignment(self):
+        with tempfile.TemporaryDirectory() as d:
+            for name in ["a.py", "b.py", "c.py"]:
+                with open(os.path.join(d, name), "w") as fp:
+                    fp.write("_('hp', 1)\n")
+
+            with self.assertRaises(hpman.DoubleAssignmentException) as serial:
+                self._create_hpm().parse_file(d)
+            with self.assertRaises(hpman.DoubleAssignmentException) as parallel:
+                self._create_hpm().parse_file(d, num_workers=3)
+            self.assertEqual(str(serial.exception), str(parallel.exception))
+            self.assertIn("==> 1: _('hp', 1)", str(serial.exception))
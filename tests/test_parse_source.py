@@ -191,6 +191,92 @@ class TestParseSource(unittest.TestCase):
         m = self.hpm.parse_source("__('hp' , 1) ")
         self.assertTrue(m.tree.empty)
 
+    def test_parse_prefilter(self):
+        from hpman.hpm_parser import may_contain_placeholder_call
+
+        for source in [
+            "_('a', 1)",
+            "x = _  ('a', 1)",
+            "x = (_\n  ('a', 1))",
+            "x = _ \\\n ('a', 1)",
+            "x = (_  # comment\n  ('a', 1))",
+            "x = f(y, _('a', 1))",
+            "x = (_)('a', 1)",
+            "x = ((_  # comment\n  ) )\n('a', 1)",
+        ]:
+            self.assertTrue(may_contain_placeholder_call(source, "_"), source)
+
+        for source in ["abc", "__('a', 1)", "a_('a', 1)", "x = _\ny = (1)"]:
+            self.assertFalse(may_contain_placeholder_call(source, "_"), source)
+
+        self.hpm.parse_source("import os\n")
+        self.hpm.parse_source("_('a', 1)")
+        self.assertEqual(self.hpm.parse_stats.num_skipped, 1)
+        self.assertEqual(self.hpm.parse_stats.num_parsed, 1)
+
+        self.hpm.parse_source("x = (_)('b', 2)\n")
+        self.assertEqual(self.hpm.get_value("b"), 2)
+
+    def test_parse_nested_calls(self):
+        source = (
+            "import os\n"
+            "@_('deco', 1)\n"
+            "def f(x=_('kw', 2)):\n"
+            "    y = '{}'.format(_('fmt', 3))\n"
+            "    class A:\n"
+            "        z = [_('nested', {'a': (1, -2)}), _('c')]\n"
+            "    return _(  # comment\n"
+            "        'multi', [1, 'x'])\n"
+        )
+        expected = [
+            ast.literal_eval(node.args[0])
+            for node in ast.walk(ast.parse(source))
+            if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "_"
+        ]
+        m = self.hpm.parse_source(source)
+        self.assertEqual(
+            [node.name for node in m.get_nodes()], [n for n in expected if n != "c"]
+        )
+        self.assertEqual(
+            m.get_values(),
+            {
+                "deco": 1,
+                "kw": 2,
+                "fmt": 3,
+                "nested": {"a": (1, -2)},
+                "multi": [1, "x"],
+            },
+        )
+
+    def test_compact(self):
+        source = (
+            "x = _('a', {'k': [1,\n"
+            "     2, 'é']}, help='a')\n"
+            "def f(y=_('b', lambda z: z + 1)):\n"
+            "    return _('c')\n"
+        )
+        self.hpm.parse_source(source)
+        expected = {
+            name: ast.dump(self.hpm.get_occurrence(name).ast_node, True, True)
+            for name in ["a", "b"]
+        }
+
+        for hpm in [
+            hpman.HyperParameterManager("_").parse_source(source).compact(),
+            hpman.HyperParameterManager("_").parse_source(
+                source, keep_ast_nodes=False
+            ),
+        ]:
+            for name in ["a", "b"]:
+                occ = hpm.get_occurrence(name)
+                self.assertIsNone(occ._ast_node)
+                self.assertEqual(ast.dump(occ.ast_node, True, True), expected[name])
+
+                # python < 3.8 does not record where the value ends
+                occ.source_span = occ.source_span[:2] + (None, None)
+                self.assertEqual(ast.dump(occ.ast_node, True, True), expected[name])
+            self.assertIsNone(hpm.tree.get("c").node.get().ast_node)
+
     def _run(self, test_data):
         """test_data spec:
         {
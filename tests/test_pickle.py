@@ -0,0 +1,143 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+import hpman
+from hpman.hpm_db import HyperParamTree, P
+
+
+class TestPickle(unittest.TestCase):
+    def setUp(self):
+        self.hpm = hpman.HyperParameterManager("_")
+        self.hpm.parse_source(
+            "_('lr', 0.1)\n"
+            "_('lr')\n"
+            "_('optimizer.type', 'sgd', choices=['sgd', 'adam'])\n"
+            "_('model.head', {'dim': 128})\n"
+            "_('empty')\n",
+            filename="train.py",
+        )
+        self.hpm.set_value("lr", 0.2)
+        self.hpm("optimizer.momentum", 0.9)
+        # a leaf turned into a branch in runtime
+        self.hpm.set_value("model.head.dim", 256)
+
+    def _loads(self, level):
+        self.hpm.pickle_level = level
+        return pickle.loads(pickle.dumps(self.hpm))
+
+    def test_levels(self):
+        sizes = []
+        for level in ["values", "locations", "full"]:
+            self.hpm.pickle_level = level
+            sizes.append(len(pickle.dumps(self.hpm)))
+
+            hpm = self._loads(level)
+            self.assertEqual(hpm.pickle_level, level)
+            self.assertEqual((hpm.placeholder, hpm.separator), ("_", "."))
+            self.assertEqual(hpm.get_values(), self.hpm.get_values())
+            self.assertEqual(hpm.get_tree().keys(), self.hpm.get_tree().keys())
+            for prefix in ["optimizer", "model"]:
+                self.assertEqual(hpm.get_tree(prefix), self.hpm.get_tree(prefix))
+            self.assertEqual(hpm.count(), self.hpm.count())
+            self.assertEqual(
+                hpm.get_occurrence("lr").priority, P.PRIORITY_SET_FROM_SETTER
+            )
+
+            # workers can keep on writing
+            hpm.set_value("lr", 0.3)
+            self.assertEqual(hpm("lr"), 0.3)
+            self.assertEqual(hpm("optimizer.momentum", 0.5), 0.5)
+        self.assertLess(sizes[0], sizes[1])
+        self.assertLess(sizes[1], sizes[2])
+
+    def test_values(self):
+        hpm = self._loads("values")
+        self.assertFalse(hpm.exists("empty"))
+        self.assertIsNotNone(hpm.tree.get("empty"))
+        self.assertEqual(len(hpm.tree.get("lr").node), 1)
+        occ = hpm.get_occurrence("optimizer.type")
+        self.assertIsNone(occ.filename)
+        self.assertIsNone(occ.hints)
+        self.assertEqual(hpm._file_occurrences, {})
+
+    def test_locations(self):
+        hpm = self._loads("locations")
+        self.assertTrue(hpm.exists("lr"))
+        self.assertFalse(hpm.exists("empty"))
+        self.assertEqual(len(hpm.tree.get("lr").node), 3)
+        occ = hpm.get_occurrence("optimizer.type")
+        self.assertEqual((occ.filename, occ.lineno), ("train.py", 3))
+        self.assertEqual(occ.hints, {"choices": ["sgd", "adam"]})
+        self.assertIsNone(occ.source_helper)
+        self.assertEqual(
+            [occ.name for occ in hpm._file_occurrences["train.py"]],
+            ["lr", "lr", "optimizer.type", "model.head", "empty"],
+        )
+        hpm.forget_file("train.py")
+        self.assertEqual(
+            hpm.get_values(),
+            {"lr": 0.2, "optimizer.momentum": 0.9, "model.head.dim": 256},
+        )
+
+    def test_full(self):
+        hpm = self._loads("full")
+        occ = hpm.get_occurrence("optimizer.type")
+        self.assertEqual(
+            occ.source_helper.source,
+            self.hpm.get_occurrence("optimizer.type").source_helper.source,
+        )
+        self.assertEqual(
+            [occ.lineno for occ in hpm.tree.get("lr").node.db],
+            [None, 1, 2],
+        )
+
+    def test_double_assignment(self):
+        for level, location in [("values", "None:None"), ("locations", "train.py:3")]:
+            hpm = self._loads(level)
+            with self.assertRaises(hpman.DoubleAssignmentException) as cm:
+                hpm.parse_source("_('optimizer.type', 'adam')\n", filename="b.py")
+            self.assertIn(location, str(cm.exception))
+
+    def test_parsed_files(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "lib.py")
+            with open(path, "w") as f:
+                f.write("_('a', 1)\n")
+            self.hpm.parse_file(path)
+
+            hpm = self._loads("locations")
+            self.assertEqual(hpm._parsed_files, self.hpm._parsed_files)
+            manifest = os.path.join(tmpdir, "hpman.manifest")
+            hpm.export_manifest(manifest)
+            self.assertEqual(
+                hpman.HyperParameterManager("_").load_manifest(manifest).get_values(),
+                {"a": 1},
+            )
+
+            self.assertEqual(self._loads("values")._parsed_files, {})
+
+    def test_frozen(self):
+        self.hpm.freeze()
+        hpm = self._loads("values")
+        self.assertTrue(hpm.frozen)
+        self.assertEqual(hpm.get_values(), self.hpm.get_values())
+
+    def test_handle(self):
+        handle = self.hpm.handle("lr")
+        self.assertEqual(handle(), 0.2)
+        handle = pickle.loads(pickle.dumps(handle))
+        self.assertEqual(handle(), 0.2)
+
+    def test_tree(self):
+        tree = pickle.loads(pickle.dumps(self.hpm.tree))
+        self.assertEqual(tree.get("model").tree_values(), {"head": {"dim": 256}})
+        self.assertEqual(tree.count(), self.hpm.tree.count())
+        with self.assertRaises(TypeError):
+            pickle.dumps(self.hpm.tree.get("model"))
+
+        with self.assertRaises(ValueError):
+            self.hpm.tree.dump("everything")
+        tree = HyperParamTree.load(self.hpm.tree.dump("values"))
+        self.assertEqual(tree.count(), self.hpm.tree.count())
@@ -0,0 +1,112 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import hpman
+from hpman.primitives import ImpossibleTree
+
+
+class TestReparse(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.hpm = hpman.HyperParameterManager("_")
+        self.lib = self._write("lib.py", "_('a', 1)\n_('b.c', 2)\n_('b.d')\n")
+        self.main = self._write("main.py", "_('a')\n_('e', 'e')\n")
+        self.hpm.parse_file(self._tmpdir.name)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self._tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_forget_file(self):
+        self.hpm.forget_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"e": "e"})
+        self.assertIsNone(self.hpm.tree.get("b"))
+        # occurrences from other files are kept
+        self.assertEqual(len(self.hpm.tree.get("a").node.db), 1)
+
+        self.hpm.forget_file(self.main)
+        self.assertTrue(self.hpm.tree.empty)
+
+    def test_reparse_file(self):
+        self._write("lib.py", "_('a', 10)\n_('b', {'c': 3})\n")
+        self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 10, "b": {"c": 3}, "e": "e"})
+        self.assertTrue(self.hpm.tree.get("b").is_leaf())
+        self.assertEqual(self.hpm.get_occurrence("a").lineno, 1)
+
+        # reparsing an unchanged file is a no-op
+        self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 10, "b": {"c": 3}, "e": "e"})
+
+    def test_reparse_atomic(self):
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    self.assertIn(self.hpm("a"), (1, 10))
+                    self.assertEqual(self.hpm.get_value("b.c"), 2)
+                except Exception as e:  # pragma: no cover
+                    errors.append(e)
+                    return
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        try:
+            for i in range(100):
+                a = 10 if i % 2 else 1
+                self._write("lib.py", "_('a', {})\n_('b.c', 2)\n".format(a))
+                self.hpm.reparse_file(self.lib)
+        finally:
+            done.set()
+            reader.join()
+        self.assertEqual(errors, [])
+
+    def test_reparse_keeps_runtime_values(self):
+        self.hpm.set_value("a", 100)
+        _ = self.hpm
+        _("b.c", 200)
+
+        self._write("lib.py", "_('a', 10)\n_('b.c', 20)\n")
+        self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_value("a"), 100)
+        self.assertEqual(self.hpm.get_value("b.c"), 200)
+
+        self.hpm.forget_file(self.lib)
+        self.assertEqual(self.hpm.get_value("a"), 100)
+        self.assertEqual(self.hpm.get_value("b.c"), 200)
+
+    def test_reparse_rollback(self):
+        self._write("lib.py", "_('a', 10)\n_('e', 'conflict')\n")
+        with self.assertRaises(hpman.DoubleAssignmentException):
+            self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 1, "b.c": 2, "e": "e"})
+
+        self._write("lib.py", "_('a', 10)\n_('e.f', 1)\n")
+        with self.assertRaises(ImpossibleTree):
+            self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 1, "b.c": 2, "e": "e"})
+
+        self._write("lib.py", "_('z.y', 1)\n_('a', 10)\n_('z.y', 2)\n")
+        with self.assertRaises(hpman.DoubleAssignmentException):
+            self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 1, "b.c": 2, "e": "e"})
+        self.assertIsNone(self.hpm.tree.get("z"))
+        self.assertEqual(self.hpm.count(), 3)
+
+        self._write("lib.py", "_('a', \n")
+        with self.assertRaises(SyntaxError):
+            self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 1, "b.c": 2, "e": "e"})
+
+        self._write("lib.py", "_('a', 10)\n")
+        self.hpm.reparse_file(self.lib)
+        self.assertEqual(self.hpm.get_values(), {"a": 10, "e": "e"})
@@ -165,6 +165,9 @@ class TestSetGet(unittest.TestCase):
         self.hpm = hpman.HyperParameterManager("_")
         self.hpm.set_tree(yamltree)
         self.assertTrue(self.hpm.tree.get("a.c").is_leaf())
+        self.assertEqual(self.hpm.get_value("a.c"), {"d": 5, "e": 6})
+        # the annotation is not removed from the given tree
+        self.assertTrue(yamltree["a"]["c"][HyperParamTree.DICT_ANNOTATION])
 
         yamltree["a"]["c"][HyperParamTree.DICT_ANNOTATION] = False
         self.hpm = hpman.HyperParameterManager("_")
@@ -188,6 +191,35 @@ class TestSetGet(unittest.TestCase):
         for out in outs[1:]:
             self.assertNotEqual(out["values"], outs[0]["values"])
 
+    def test_values_cache(self):
+        self.hpm.set_values({"a.b": 1, "c": 2})
+        values, tree = self.hpm.get_values(), self.hpm.get_tree()
+        self.assertIs(self.hpm._get_values(), self.hpm._get_values())
+
+        # the caches are not exposed
+        self.hpm.get_tree()["a"]["b"] = 999
+        self.hpm.get_value("a")["zzz"] = 0
+        self.hpm.get_values()["zzz"] = 1
+        self.hpm.handle("a").value["b"] = 999
+        self.assertEqual(self.hpm.get_value("a"), {"b": 1})
+        self.assertEqual(self.hpm.get_values(), values)
+        self.assertEqual(self.hpm.get_tree(), tree)
+        self.assertFalse(self.hpm.exists("zzz"))
+
+        self.hpm.set_value("a.b", 3)
+        self.assertEqual(self.hpm.get_values(), {"a.b": 3, "c": 2})
+        self.assertEqual(self.hpm.get_tree(), {"a": {"b": 3}, "c": 2})
+        self.assertEqual(values, {"a.b": 1, "c": 2})
+
+    def test_annotated_tree_copies(self):
+        self.hpm.set_values({"a.b": 1, "d": {"x": 1}})
+        annotated = self.hpm.get_tree(annotate_dict=True)
+        annotated["d"].pop(hpman.HyperParamTree.DICT_ANNOTATION)
+        self.assertEqual(
+            self.hpm.get_tree(annotate_dict=True)["d"],
+            {"x": 1, hpman.HyperParamTree.DICT_ANNOTATION: True},
+        )
+
     def test_dict_val_in_tree(self):
         test_vals = {"a.b": 1, "c": {"d": 2}}
         self.hpm.set_values(test_vals)
@@ -207,6 +239,22 @@ class TestSetGet(unittest.TestCase):
         except Exception as e:
             self.fail("double set should be allowed: {}".format(e))
 
+    def test_exists(self):
+        self.hpm.parse_source("_('a.b', 1)\n_('a.c')\n_('d', {'e': 1})\n")
+        for name, exists, leaf, branch, count in [
+            ("", True, False, True, 2),
+            ("a", True, False, True, 1),
+            ("a.b", True, True, False, 1),
+            ("a.c", False, False, False, 0),
+            ("d", True, True, False, 1),
+            ("d.e", False, False, False, 0),
+            ("x", False, False, False, 0),
+        ]:
+            self.assertEqual(self.hpm.exists(name), exists, name)
+            self.assertEqual(self.hpm.is_leaf_name(name), leaf, name)
+            self.assertEqual(self.hpm.is_branch_name(name), branch, name)
+            self.assertEqual(self.hpm.count(name), count, name)
+
     def test_get_with_nonexist_hp(self):
         self.hpm.set_values({"exist_hp": "1"})
         with self.assertRaises(KeyError):
@@ -0,0 +1,149 @@
+import multiprocessing
+import pickle
+import threading
+import unittest
+
+import hpman
+from hpman.hpm_shared import SharedValueTable
+
+
+def _get_fork_context():
+    try:
+        return multiprocessing.get_context("fork")
+    except ValueError:  # pragma: no cover
+        return None
+
+
+class TestShared(unittest.TestCase):
+    def test_table(self):
+        table = SharedValueTable(size=1024)
+        self.assertTrue(table.is_owner())
+        self.assertIsNone(table.poll())
+        table.publish({"a": 1, "b": [2]})
+        table.publish({"a": 3})
+        # the owner has seen its own writes
+        self.assertIsNone(table.poll())
+        with self.assertRaises(ValueError):
+            table.publish({"c": "x" * 1024})
+
+    def test_failed_publish(self):
+        hpm = hpman.HyperParameterManager("_").share(size=256)
+        hpm.set_value("small", 1)
+        with self.assertRaises(ValueError):
+            hpm.set_value("big", "x" * 1000)
+        with self.assertRaises(ValueError):
+            hpm.set_values({"small": 2, "big": "x" * 1000})
+        with self.assertRaises((TypeError, pickle.PicklingError)):
+            hpm.set_value("lock", threading.Lock())
+        # nothing is written
+        self.assertEqual(hpm.get_values(), {"small": 1})
+
+        hpm.set_value("small", 3)
+        self.assertEqual(hpm.get_value("small"), 3)
+
+    @unittest.skipIf(_get_fork_context() is None, "fork is not available")
+    def test_partial_write(self):
+        ctx = _get_fork_context()
+        hpm = hpman.HyperParameterManager("_").share()
+        hpm.set_value("lr", 0.1)
+
+        written = ctx.Event()
+        results = ctx.Queue()
+
+        def worker():
+            written.wait(10)
+            results.put(hpm.get_values())
+
+        p = ctx.Process(target=worker)
+        p.start()
+        try:
+            with self.assertRaises(hpman.ImpossibleTree):
+                hpm.set_values({"x": 5, "a.b": 1, "a": 2})
+            with self.assertRaises(hpman.ImpossibleTree):
+                hpm.set_tree({"a": {1: 2}})
+            written.set()
+            # writes applied before the failure are shared as well
+            self.assertEqual(results.get(timeout=10), hpm.get_values())
+        finally:
+            p.join(10)
+        self.assertEqual(p.exitcode, 0)
+        self.assertEqual(hpm.get_values(), {"lr": 0.1, "x": 5, "a.b": 1})
+
+    @unittest.skipIf(_get_fork_context() is None, "fork is not available")
+    def test_fork(self):
+        ctx = _get_fork_context()
+        hpm = hpman.HyperParameterManager("_").share()
+        hpm.parse_source("_('aug', 'none')\n_('lr', 0.1)\n")
+        hpm.set_value("lr", 0.2)
+        _ = hpm.handle("aug")
+
+        forked = ctx.Event()
+        written = ctx.Event()
+        results = ctx.Queue()
+
+        def worker():
+            forked.set()
+            results.put((_(), hpm.get_value("lr"), len(hpm.tree.get("lr").node)))
+            written.wait(10)
+            hpm.set_value("local", 1)
+            results.put((_(), hpm.get_tree(), hpm.tree.get("lr").node.value))
+
+        p = ctx.Process(target=worker)
+        p.start()
+        try:
+            self.assertTrue(forked.wait(10))
+            # writes before the fork are not applied twice
+            self.assertEqual(results.get(timeout=10), ("none", 0.2, 2))
+            hpm.set_tree({"aug": "flip"})
+            written.set()
+            aug, tree, lr = results.get(timeout=10)
+            self.assertEqual(aug, "flip")
+            self.assertEqual(tree, {"aug": "flip", "lr": 0.2, "local": 1})
+            self.assertEqual(lr, 0.2)
+        finally:
+            p.join(10)
+        self.assertEqual(p.exitcode, 0)
+        # writes of the child stay in the child
+        self.assertFalse(hpm.exists("local"))
+
+    @unittest.skipIf(_get_fork_context() is None, "fork is not available")
+    def test_fork_while_locked(self):
+        ctx = _get_fork_context()
+        hpm = hpman.HyperParameterManager("_").share()
+        hpm.set_value("lr", 0.1)
+
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with hpm._lock:
+                locked.set()
+                release.wait(10)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        self.assertTrue(locked.wait(10))
+
+        written = ctx.Event()
+        results = ctx.Queue()
+
+        def worker():
+            written.wait(10)
+            # the lock held by the thread of the parent is not inherited
+            results.put(hpm.get_value("lr"))
+            hpm.set_value("local", 1)
+            results.put(hpm.get_value("local"))
+
+        p = ctx.Process(target=worker)
+        p.start()
+        try:
+            release.set()
+            holder.join()
+            hpm.set_value("lr", 0.2)
+            written.set()
+            self.assertEqual(results.get(timeout=10), 0.2)
+            self.assertEqual(results.get(timeout=10), 1)
+        finally:
+            p.join(10)
+            if p.is_alive():  # pragma: no cover
+                p.kill()
+        self.assertEqual(p.exitcode, 0)
@@ -1,7 +1,9 @@
 import os
+import tempfile
 import unittest
 
 from hpman import SourceHelper
+from hpman.source_helper import file_fingerprint
 
 DIR_PATH = os.path.dirname(os.path.realpath(__file__))
 
@@ -19,3 +21,26 @@ class TestSourceHelper(unittest.TestCase):
         SourceHelper("a=1\nc=123\n")
         SourceHelper.format_given_source_and_lineno("a=1", 1)
         SourceHelper.format_given_filepath_and_lineno(f("test_files/all_in_one.py"), 2)
+
+    def test_lazy_source_helper(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "lib.py")
+            with open(path, "w") as fp:
+                fp.write("a = 1\nb = _('b', 2)\n")
+
+            helper = SourceHelper.lazy(path, file_fingerprint(path))
+            self.assertIsNone(helper._lines)
+            self.assertEqual(helper.lines, ["a = 1", "b = _('b', 2)", ""])
+            self.assertEqual(
+                helper.format_given_filename_and_lineno(path, 2),
+                SourceHelper.format_given_filepath_and_lineno(path, 2),
+            )
+            # nothing is kept after formatting
+            self.assertIsNone(helper._lines)
+
+            with open(path, "w") as fp:
+                fp.write("# modified\n")
+            self.assertFalse(helper.available)
+            self.assertIn(
+                "unavailable", helper.format_given_filename_and_lineno(path, 2)
+            )
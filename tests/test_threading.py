@@ -0,0 +1,111 @@
+import sys
+import threading
+import unittest
+
+import hpman
+from hpman.hpm_zoo_monkey_patch import hpm_zoo
+
+
+class TestThreading(unittest.TestCase):
+    def setUp(self):
+        self._switch_interval = sys.getswitchinterval()
+        # switch threads as often as possible to provoke races
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self._switch_interval)
+
+    def _run(self, targets):
+        errors = []
+
+        def wrap(target):
+            def run():
+                try:
+                    target()
+                except BaseException as e:  # pragma: no cover
+                    errors.append(e)
+
+            return run
+
+        threads = [threading.Thread(target=wrap(target)) for target in targets]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+
+    def test_stress(self):
+        hpm = hpman.HyperParameterManager("_")
+        hpm.parse_source("_('fixed.a', 0)\n_('fixed.b', 1)\n")
+        # many siblings, so that iterating them takes a while
+        hpm.set_values({"other{}".format(i): i for i in range(200)})
+        num_writers, num_steps = 4, 2000
+        done = threading.Event()
+
+        def writer(i):
+            def run():
+                for step in range(num_steps):
+                    hpm.set_value("w{}.step".format(i), step)
+                    hpm("w{}.call".format(i), step)
+                    name = "parsed{}_{}".format(i, step % 5)
+                    # parsed files are added to and removed from the root
+                    hpm.parse_source(
+                        "_('{}.x', {})".format(name, step), filename=name
+                    )
+                    hpm.forget_file(name)
+
+            return run
+
+        def reader():
+            handles = [hpm.handle("w{}.step".format(i)) for i in range(num_writers)]
+            last = [-1] * num_writers
+            while not done.is_set():
+                tree = hpm.get_tree()
+                self.assertEqual(tree["fixed"], {"a": 0, "b": 1})
+                values = hpm.get_values()
+                self.assertEqual(values["fixed.b"], 1)
+                self.assertGreaterEqual(hpm.count(), 2)
+                self.assertTrue(hpm.exists("fixed"))
+                self.assertEqual(dict(hpm.view("fixed")), {"a": 0, "b": 1})
+                for k in hpm.view():
+                    hpm.get_value(k, raise_exception=False)
+                for i, h in enumerate(handles):
+                    try:
+                        step = h.value
+                    except KeyError:
+                        continue
+                    # values never go back in time
+                    self.assertGreaterEqual(step, last[i])
+                    last[i] = step
+
+        writers = [writer(i) for i in range(num_writers)]
+
+        def writers_then_done():
+            try:
+                self._run(writers)
+            finally:
+                done.set()
+
+        self._run([writers_then_done] + [reader] * 4)
+
+        expected = {"fixed.a": 0, "fixed.b": 1}
+        expected.update({"other{}".format(i): i for i in range(200)})
+        for i in range(num_writers):
+            expected["w{}.step".format(i)] = num_steps - 1
+            expected["w{}.call".format(i)] = num_steps - 1
+        self.assertEqual(hpm.get_values(), expected)
+        self.assertEqual(hpm.count(), len(expected))
+        self.assertEqual(hpm.tree.count(), len(list(hpm.tree.flatten())))
+        for i in range(num_writers):
+            self.assertEqual(hpm.handle("w{}.step".format(i)).value, num_steps - 1)
+
+    def test_zoo(self):
+        from hpman import m
+
+        name = "test_threading_zoo"
+        results = []
+        self._run([lambda: results.append(getattr(m, name))] * 8)
+        self.assertEqual(len(results), 8)
+        for hpm in results:
+            self.assertIs(hpm, hpm_zoo[name])
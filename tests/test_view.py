@@ -0,0 +1,46 @@
+import collections.abc
+import unittest
+
+import hpman
+
+
+class TestView(unittest.TestCase):
+    def setUp(self):
+        self.hpm = hpman.HyperParameterManager("_")
+        self.hpm.set_values(
+            {"model.backbone.depth": 50, "model.head": {"dim": 128}, "lr": 0.1}
+        )
+
+    def test_same_as_tree(self):
+        view = self.hpm.view()
+        self.assertIsInstance(view, collections.abc.Mapping)
+        self.assertEqual(view, self.hpm.get_tree())
+        self.assertEqual(self.hpm.view("model"), self.hpm.get_tree("model"))
+        self.assertEqual(list(view), ["model", "lr"])
+        self.assertEqual(len(view), 2)
+        self.assertIn("model", view)
+        self.assertNotIn("model.head", view)
+
+        model = view["model"]
+        self.assertIsInstance(model, hpman.HyperParamTreeView)
+        self.assertEqual(model["backbone"]["depth"], 50)
+        self.assertEqual(model.get("nope", 1), 1)
+        with self.assertRaises(KeyError):
+            model["nope"]
+
+    def test_zero_copy(self):
+        head = self.hpm.get_value("model.head")
+        self.assertIs(self.hpm.view("model")["head"], head)
+
+    def test_live(self):
+        model = self.hpm.view("model")
+        self.hpm.set_value("model.backbone.depth", 101)
+        self.hpm.set_value("model.neck", "fpn")
+        self.assertEqual(model["backbone"]["depth"], 101)
+        self.assertEqual(model["neck"], "fpn")
+
+    def test_invalid_prefix(self):
+        self.assertEqual(hpman.HyperParameterManager("_").view(), {})
+        for prefix in ["nope", "lr", "model.head"]:
+            with self.assertRaises(KeyError):
+                self.hpm.view(prefix)
@@ -0,0 +1,51 @@
+import os
+import time
+
+import hpman
+from helpers import SourceDirTestCase
+from hpman.hpm_watch import HyperParameterWatcher
+
+
+class TestWatch(SourceDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dir = self.src_dir
+        self.lib = self.write_source("lib.py", "_('a', 1)\n")
+        self.hpm = hpman.HyperParameterManager("_").parse_file(self.dir)
+
+    def test_poll(self):
+        watcher = HyperParameterWatcher(self.hpm, self.dir, debounce=0)
+        self.assertEqual(watcher.poll(), [])
+
+        self.write_source("lib.py", "_('a', 2)\n")
+        new = self.write_source("new.py", "_('b', 3)\n")
+        self.assertEqual(watcher.poll(), [self.lib, new])
+        self.assertEqual(self.hpm.get_values(), {"a": 2, "b": 3})
+
+        os.remove(new)
+        self.assertEqual(watcher.poll(), [new])
+        self.assertEqual(self.hpm.get_values(), {"a": 2})
+
+    def test_poll_with_error(self):
+        watcher = HyperParameterWatcher(self.hpm, self.dir, debounce=0)
+        self.write_source("lib.py", "_('a', \n")
+        with self.assertWarns(RuntimeWarning):
+            watcher.poll()
+        self.assertIsInstance(watcher.last_error, SyntaxError)
+        self.assertEqual(self.hpm.get_values(), {"a": 1})
+
+        self.write_source("lib.py", "_('a', 3)\n")
+        watcher.poll()
+        self.assertEqual(self.hpm.get_values(), {"a": 3})
+
+    def test_watch_thread(self):
+        watcher = self.hpm.watch(self.dir, interval=0.01, debounce=0.01)
+        try:
+            self.write_source("lib.py", "_('a', 4)\n")
+            deadline = time.time() + 10
+            while self.hpm.get_value("a") != 4 and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.hpm.get_value("a"), 4)
+        finally:
+            watcher.stop()
+        self.assertFalse(watcher.is_alive())